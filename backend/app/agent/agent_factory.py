@@ -19,6 +19,14 @@ _FIREWORKS_MODEL = OpenAIModel(
 _AGENT_CACHE: dict[tuple[VideoStyle, str], Agent[None, str]] = {}
 
 
+def compose_system_prompt(style: VideoStyle, base_system_prompt: str) -> str:
+    """Return the full enhancer system prompt for *style*."""
+    config = get_style_config(style)
+    if config.system_prompt_addendum:
+        return f"{base_system_prompt}\n\n{config.system_prompt_addendum}"
+    return base_system_prompt
+
+
 def get_prompt_enhancer_agent(
     style: VideoStyle,
     base_system_prompt: str,
@@ -26,13 +34,9 @@ def get_prompt_enhancer_agent(
     """Return (or create) a cached prompt enhancer Agent for the given style."""
     cache_key = (style, base_system_prompt)
     if cache_key not in _AGENT_CACHE:
-        config = get_style_config(style)
-        system_prompt = base_system_prompt
-        if config.system_prompt_addendum:
-            system_prompt = f"{base_system_prompt}\n\n{config.system_prompt_addendum}"
         _AGENT_CACHE[cache_key] = Agent(
             _FIREWORKS_MODEL,
-            system_prompt=system_prompt,
+            system_prompt=compose_system_prompt(style, base_system_prompt),
             output_type=str,
         )
     return _AGENT_CACHE[cache_key]
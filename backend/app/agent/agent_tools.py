@@ -0,0 +1,148 @@
+"""Custom in-process tools exposed to the Remotion agent over SDK MCP."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+from pathlib import Path
+from typing import Any
+
+from claude_agent_sdk import create_sdk_mcp_server, tool
+
+from app.agent.chunked_render import RenderError, render_chunked
+from app.agent.preview_render import render_previews, select_frames
+from app.agent.render_progress import RenderProgressTracker
+from app.config import settings
+
+TOOLS_SERVER_NAME = "renderwood"
+RENDER_VIDEO_TOOL = f"mcp__{TOOLS_SERVER_NAME}__render_video"
+PREVIEW_FRAMES_TOOL = f"mcp__{TOOLS_SERVER_NAME}__preview_frames"
+
+_PREVIEW_FRAMES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "composition_id": {"type": "string"},
+        "frames": {
+            "type": "array",
+            "items": {"type": "integer"},
+            "description": "Frame numbers to render.",
+        },
+        "timestamps": {
+            "type": "array",
+            "items": {"type": "number"},
+            "description": "Times in seconds to render, converted with fps.",
+        },
+        "every_nth_frame": {
+            "type": "integer",
+            "description": "Sample every Nth frame; needs duration_in_frames.",
+        },
+        "duration_in_frames": {"type": "integer"},
+        "fps": {"type": "number"},
+        "scale": {
+            "type": "number",
+            "description": "Output scale relative to the composition size.",
+        },
+    },
+    "required": ["composition_id"],
+}
+
+
+def _text(text: str, *, is_error: bool = False) -> dict[str, Any]:
+    result: dict[str, Any] = {"content": [{"type": "text", "text": text}]}
+    if is_error:
+        result["is_error"] = True
+    return result
+
+
+def build_agent_tools(
+    job_dir: Path, progress: RenderProgressTracker | None = None
+) -> tuple[Any, list[str]]:
+    """Return the job-scoped MCP server config and the tool names it exposes.
+
+    ``preview_frames`` is always offered. ``render_video`` is only offered
+    when ``settings.render_mode`` is ``"chunked"``; in ``"single"`` mode the
+    agent renders with the CLI.
+    """
+    preview_lock = asyncio.Lock()
+
+    @tool(
+        "preview_frames",
+        "Render a few low-resolution JPEG stills of a composition and return "
+        "them for inspection. Takes seconds, so use it to check layout, text "
+        "and timing before the full render. Choose frames, timestamps, or "
+        f"every_nth_frame; at most {settings.preview_max_frames} stills "
+        f"are rendered, at scale {settings.preview_scale} by default.",
+        _PREVIEW_FRAMES_SCHEMA,
+    )
+    async def preview_frames(args: dict[str, Any]) -> dict[str, Any]:
+        frames = select_frames(
+            frames=[int(f) for f in args.get("frames") or []],
+            timestamps=[float(t) for t in args.get("timestamps") or []],
+            every_nth_frame=args.get("every_nth_frame"),
+            duration_in_frames=args.get("duration_in_frames"),
+            fps=args.get("fps"),
+        )
+        if not frames:
+            return _text(
+                "Pass frames, timestamps, or every_nth_frame with "
+                "duration_in_frames",
+                is_error=True,
+            )
+
+        async with preview_lock:
+            try:
+                rendered, errors = await render_previews(
+                    job_dir,
+                    str(args["composition_id"]),
+                    frames,
+                    scale=args.get("scale"),
+                )
+            except RenderError as exc:
+                return _text(str(exc), is_error=True)
+
+        content: list[dict[str, Any]] = []
+        for frame, path in rendered:
+            content.append({"type": "text", "text": f"Frame {frame}:"})
+            content.append({
+                "type": "image",
+                "data": base64.b64encode(path.read_bytes()).decode("ascii"),
+                "mimeType": "image/jpeg",
+            })
+        content.extend({"type": "text", "text": error} for error in errors)
+        result: dict[str, Any] = {"content": content}
+        if not rendered:
+            result["is_error"] = True
+        return result
+
+    tools = [preview_frames]
+    tool_names = [PREVIEW_FRAMES_TOOL]
+
+    @tool(
+        "render_video",
+        "Render a composition to output/video.mp4 using parallel frame chunks. "
+        "Use this instead of running `npx remotion render` yourself.",
+        {"composition_id": str, "duration_in_frames": int},
+    )
+    async def render_video(args: dict[str, Any]) -> dict[str, Any]:
+        composition_id = str(args["composition_id"])
+        duration_in_frames = int(args["duration_in_frames"])
+        if duration_in_frames <= 0:
+            return _text("duration_in_frames must be positive", is_error=True)
+
+        output_path = job_dir / "output" / "video.mp4"
+        try:
+            await render_chunked(
+                job_dir, composition_id, duration_in_frames, output_path, progress
+            )
+        except RenderError as exc:
+            return _text(str(exc), is_error=True)
+        return _text(f"Rendered {duration_in_frames} frames to output/video.mp4")
+
+    if settings.render_mode == "chunked":
+        tools.append(render_video)
+        tool_names.append(RENDER_VIDEO_TOOL)
+
+    server = create_sdk_mcp_server(
+        name=TOOLS_SERVER_NAME, version="1.0.0", tools=tools
+    )
+    return server, tool_names
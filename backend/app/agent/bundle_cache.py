@@ -0,0 +1,94 @@
+"""Shared Remotion bundler cache used by every job workspace.
+
+Remotion bundles with webpack's filesystem cache. Pointing every workspace at
+one cache directory (via ``REMOTION_BUNDLE_CACHE_DIR``, read by the template's
+``remotion.config.js``) means ``node_modules`` dependencies, which resolve to
+the same paths in every workspace, are compiled once. Webpack keys modules on
+their absolute path, so each job's own ``src/`` is still compiled in full. The
+directory is keyed on the template's ``package-lock.json`` so a dependency
+upgrade starts a fresh cache. The template is bundled once at startup to warm
+the cache.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import os
+from pathlib import Path
+
+from app.agent.observability import get_logfire
+from app.config import settings
+
+BUNDLE_CACHE_ENV_VAR = "REMOTION_BUNDLE_CACHE_DIR"
+TEMPLATE_BUNDLE_DIR_NAME = "template-bundle"
+
+
+@functools.cache
+def cache_dir() -> Path:
+    """Return the bundler cache directory for the current template lockfile."""
+    lockfile = settings.remotion_project_path / "package-lock.json"
+    try:
+        key = hashlib.sha256(lockfile.read_bytes()).hexdigest()[:16]
+    except FileNotFoundError:
+        key = "unlocked"
+    return settings.bundle_cache_dir / key
+
+
+def bundle_env() -> dict[str, str]:
+    """Return environment variables that point Remotion at the shared cache."""
+    return {BUNDLE_CACHE_ENV_VAR: str(cache_dir())}
+
+
+async def prebundle_template() -> bool:
+    """Bundle the template once so the shared cache starts warm."""
+    logfire = get_logfire()
+    directory = cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with logfire.span("prebundle_template", cache_dir=str(directory)):
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "npx",
+                "remotion",
+                "bundle",
+                "--out-dir",
+                str(directory / TEMPLATE_BUNDLE_DIR_NAME),
+                cwd=settings.remotion_project_path,
+                env={**os.environ, **bundle_env()},
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as exc:
+            logfire.error("prebundle_failed", error=str(exc))
+            return False
+
+        try:
+            _, stderr = await asyncio.wait_for(
+                process.communicate(), timeout=settings.max_render_timeout
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            process.kill()
+            await process.wait()
+            raise
+
+        if process.returncode != 0:
+            logfire.error(
+                "prebundle_failed",
+                returncode=process.returncode,
+                stderr=stderr.decode(errors="replace")[-2000:],
+            )
+            return False
+
+        logfire.info("prebundle_complete")
+        return True
+
+
+def log_prebundle_result(task: asyncio.Task[bool]) -> None:
+    """Done callback for the startup prebundle task; logs how it ended."""
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        get_logfire().error("prebundle_failed", error=str(exc) or type(exc).__name__)
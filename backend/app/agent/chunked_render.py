@@ -0,0 +1,188 @@
+"""Parallel chunked rendering of a Remotion composition.
+
+The composition is bundled once, its frame range is split into chunks that
+render concurrently in separate ``remotion render --frames`` processes, and
+the chunks are joined with ffmpeg's concat demuxer. Chunks are rendered as
+``h264-mkv`` with PCM audio so the video streams can be concatenated
+losslessly and the audio is encoded to AAC once, without priming gaps at
+chunk boundaries. The joined MP4 is left for packaging to remux with
+faststart, like a single render.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+from collections.abc import Callable
+from pathlib import Path
+
+from app.agent.bundle_cache import bundle_env
+from app.agent.observability import get_logfire
+from app.agent.render_progress import RenderProgressTracker
+from app.agent.subprocesses import CommandResult, run_command
+from app.config import settings
+
+BUNDLE_DIR_NAME = ".bundle"
+CHUNKS_DIR_NAME = ".chunks"
+
+
+class RenderError(RuntimeError):
+    """Raised when a render step fails; the message carries the output tail."""
+
+
+def frame_ranges(duration_in_frames: int, chunk_count: int) -> list[tuple[int, int]]:
+    """Split ``[0, duration_in_frames)`` into at most *chunk_count* ranges."""
+    chunk_count = max(1, min(chunk_count, duration_in_frames))
+    base, extra = divmod(duration_in_frames, chunk_count)
+    ranges = []
+    start = 0
+    for index in range(chunk_count):
+        length = base + (1 if index < extra else 0)
+        ranges.append((start, start + length - 1))
+        start += length
+    return ranges
+
+
+def _progress_feed(
+    progress: RenderProgressTracker | None, source: str
+) -> Callable[[str], None] | None:
+    if progress is None:
+        return None
+    return lambda line: progress.feed(source, line)
+
+
+def _check(result: CommandResult, step: str) -> None:
+    if not result.ok:
+        raise RenderError(
+            f"{step} failed (exit {result.returncode}):\n{result.output_tail}"
+        )
+
+
+async def bundle_project(job_dir: Path, out_dir: Path) -> None:
+    """Bundle the job's Remotion project into *out_dir*.
+
+    The project is bundled against an empty public directory and the
+    bundle's ``public/`` is then symlinked to the job's own, so uploads and
+    the music library are not copied into every bundle, and files the agent
+    adds to ``public/`` afterwards are served without bundling again.
+    """
+    empty_public = out_dir.with_name(f"{out_dir.name}.public")
+    await asyncio.to_thread(empty_public.mkdir, parents=True, exist_ok=True)
+    try:
+        result = await run_command(
+            [
+                "npx",
+                "remotion",
+                "bundle",
+                "--out-dir",
+                str(out_dir),
+                "--public-dir",
+                str(empty_public),
+            ],
+            cwd=job_dir,
+            env=bundle_env(),
+        )
+    finally:
+        await asyncio.to_thread(shutil.rmtree, empty_public, ignore_errors=True)
+    _check(result, "remotion bundle")
+    await asyncio.to_thread(_link_public, job_dir, out_dir)
+
+
+def _fresh_dir(path: Path) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+
+
+def _remove_dirs(*paths: Path) -> None:
+    for path in paths:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _link_public(job_dir: Path, out_dir: Path) -> None:
+    """Replace the bundle's copied ``public/`` with a link to the job's."""
+    public = out_dir / "public"
+    shutil.rmtree(public, ignore_errors=True)
+    os.symlink((job_dir / "public").resolve(), public, target_is_directory=True)
+
+
+async def render_chunked(
+    job_dir: Path,
+    composition_id: str,
+    duration_in_frames: int,
+    output_path: Path,
+    progress: RenderProgressTracker | None = None,
+) -> None:
+    """Render *composition_id* to *output_path* in parallel frame chunks.
+
+    Each chunk's CLI output is fed to *progress* as its own source.
+    """
+    logfire = get_logfire()
+    output_dir = output_path.parent
+    bundle_dir = output_dir / BUNDLE_DIR_NAME
+    chunks_dir = output_dir / CHUNKS_DIR_NAME
+    await asyncio.to_thread(_fresh_dir, chunks_dir)
+
+    ranges = frame_ranges(duration_in_frames, settings.render_chunk_count)
+    with logfire.span(
+        "chunked_render",
+        composition_id=composition_id,
+        duration_in_frames=duration_in_frames,
+        chunks=len(ranges),
+    ):
+        try:
+            await bundle_project(job_dir, bundle_dir)
+
+            chunk_paths = [
+                chunks_dir / f"chunk_{index:03d}.mkv" for index in range(len(ranges))
+            ]
+            results = await asyncio.gather(*(
+                run_command(
+                    [
+                        "npx",
+                        "remotion",
+                        "render",
+                        str(bundle_dir),
+                        composition_id,
+                        str(chunk_path),
+                        "--codec=h264-mkv",
+                        "--enforce-audio-track",
+                        f"--frames={first}-{last}",
+                        f"--concurrency={settings.render_chunk_concurrency}",
+                    ],
+                    cwd=job_dir,
+                    env=bundle_env(),
+                    on_line=_progress_feed(progress, chunk_path.stem),
+                )
+                for chunk_path, (first, last) in zip(chunk_paths, ranges)
+            ))
+            for index, result in enumerate(results):
+                _check(result, f"render of chunk {index}")
+
+            concat_list = chunks_dir / "concat.txt"
+            await asyncio.to_thread(
+                concat_list.write_text,
+                "".join(f"file '{path.name}'\n" for path in chunk_paths),
+            )
+            result = await run_command(
+                [
+                    "ffmpeg",
+                    "-y",
+                    "-f",
+                    "concat",
+                    "-safe",
+                    "0",
+                    "-i",
+                    str(concat_list),
+                    "-c:v",
+                    "copy",
+                    "-c:a",
+                    "aac",
+                    "-b:a",
+                    "320k",
+                    str(output_path),
+                ],
+            )
+            _check(result, "ffmpeg concat")
+        finally:
+            await asyncio.to_thread(_remove_dirs, chunks_dir, bundle_dir)
@@ -0,0 +1,66 @@
+"""Filesystem helpers for sharing file contents without copying them."""
+
+from __future__ import annotations
+
+import fcntl
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+# ioctl request number for FICLONE on Linux (copy-on-write clone).
+_FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Try a copy-on-write clone of *src* to *dst*. Returns True on success."""
+    if not hasattr(fcntl, "ioctl"):
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dst, "xb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Share *src* at *dst* by hardlink, then reflink, then plain copy."""
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    if not _reflink(src, dst):
+        shutil.copy2(src, dst)
+
+
+def link_tree(src: Path, dst: Path) -> None:
+    """Recreate the directory tree *src* at *dst* with hardlinked files."""
+    dst.mkdir(parents=True, exist_ok=True)
+    for entry in os.scandir(src):
+        target = dst / entry.name
+        if entry.is_symlink():
+            os.symlink(os.readlink(entry.path), target)
+        elif entry.is_dir():
+            link_tree(Path(entry.path), target)
+        else:
+            link_or_copy(Path(entry.path), target)
+
+
+def publish_file(src: Path, dst: Path) -> None:
+    """Make *src* appear at *dst* atomically, without copying if possible.
+
+    The content is linked (or reflinked, or as a last resort copied) to a
+    temp name beside *dst* and renamed into place, so readers of *dst* only
+    ever see the previous file or the complete new one.
+    """
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        link_or_copy(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
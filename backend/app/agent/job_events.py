@@ -0,0 +1,137 @@
+"""Per-job event streams for live progress (served as Server-Sent Events).
+
+Each job has a stream holding a bounded replay buffer, so a subscriber that
+connects late, or reconnects with ``Last-Event-ID``, first receives the
+buffered events it missed and then follows live events until the job ends.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator
+from typing import Any, NamedTuple
+
+from app.config import settings
+
+END_EVENT = "end"
+
+
+class JobEvent(NamedTuple):
+    """A single progress event."""
+
+    id: int
+    type: str
+    data: dict[str, Any]
+
+
+class JobEventStream:
+    """Replay buffer plus live fan-out for one job's events."""
+
+    def __init__(self, buffer_size: int) -> None:
+        self._buffer: deque[JobEvent] = deque(maxlen=max(1, buffer_size))
+        self._subscribers: set[asyncio.Queue[JobEvent | None]] = set()
+        self._next_id = 1
+        self.closed = False
+
+    def publish(self, event_type: str, data: dict[str, Any]) -> None:
+        """Append an event and deliver it to live subscribers."""
+        if self.closed:
+            return
+        event = JobEvent(self._next_id, event_type, data)
+        self._next_id += 1
+        self._buffer.append(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A stalled client: end its stream so it reconnects and
+                # catches up from the replay buffer.
+                self._subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    def close(self) -> None:
+        """Publish the end event and stop accepting new ones."""
+        if self.closed:
+            return
+        self.publish(END_EVENT, {})
+        self.closed = True
+
+    async def subscribe(
+        self, last_event_id: int = 0, heartbeat_seconds: float = 15.0
+    ) -> AsyncIterator[JobEvent | None]:
+        """Yield buffered events after *last_event_id*, then live ones.
+
+        Yields None every *heartbeat_seconds* without events so callers can
+        send keep-alives. Stops after the end event.
+        """
+        queue: asyncio.Queue[JobEvent | None] = asyncio.Queue(
+            maxsize=self._buffer.maxlen or 1
+        )
+        replay = [event for event in self._buffer if event.id > last_event_id]
+        if not self.closed:
+            self._subscribers.add(queue)
+        try:
+            for event in replay:
+                yield event
+                if event.type == END_EVENT:
+                    return
+            if self.closed:
+                return
+
+            seen = replay[-1].id if replay else last_event_id
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    return
+                if event.id <= seen:
+                    continue
+                yield event
+                if event.type == END_EVENT:
+                    return
+        finally:
+            self._subscribers.discard(queue)
+
+
+class JobEventBus:
+    """Registry of event streams keyed by job id."""
+
+    def __init__(self, buffer_size: int, max_streams: int) -> None:
+        self._buffer_size = buffer_size
+        self._max_streams = max(1, max_streams)
+        self._streams: OrderedDict[str, JobEventStream] = OrderedDict()
+
+    def publish(self, job_id: str, event_type: str, **data: Any) -> None:
+        """Publish an event on *job_id*'s stream, creating it if needed."""
+        stream = self._streams.get(job_id)
+        if stream is None:
+            stream = self._streams[job_id] = JobEventStream(self._buffer_size)
+            self._evict()
+        stream.publish(event_type, data)
+
+    def close(self, job_id: str) -> None:
+        """End *job_id*'s stream; its replay buffer stays available."""
+        stream = self._streams.get(job_id)
+        if stream is not None:
+            stream.close()
+
+    def get(self, job_id: str) -> JobEventStream | None:
+        """Return the stream for *job_id*, or None if it has none."""
+        return self._streams.get(job_id)
+
+    def _evict(self) -> None:
+        """Drop the oldest finished streams beyond ``max_streams``."""
+        excess = len(self._streams) - self._max_streams
+        for job_id in [j for j, s in self._streams.items() if s.closed][:excess]:
+            del self._streams[job_id]
+
+
+job_events = JobEventBus(
+    buffer_size=settings.job_event_buffer_size,
+    max_streams=settings.job_event_max_streams,
+)
@@ -1,24 +1,51 @@
-"""Helpers for Remotion job identifiers."""
+"""Helpers for Remotion job identifiers.
+
+Job ids are allocated from a persistent counter stored next to the job
+directories. The counter file is updated under an exclusive ``flock`` so ids
+stay unique across concurrent requests and multiple server processes, and
+allocation never has to scan the jobs directory.
+"""
 
 from __future__ import annotations
 
+import fcntl
+import os
 from pathlib import Path
 
+COUNTER_FILE_NAME = ".job_counter"
+
+
+def _run_number(name: str) -> int:
+    """Return the numeric suffix of a run_<n> name, or 0 if it has none."""
+    if not name.startswith("run_"):
+        return 0
+    suffix = name[4:]
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def _highest_existing_run(jobs_path: Path) -> int:
+    """Scan *jobs_path* once to seed a missing counter from existing jobs."""
+    return max(
+        (_run_number(path.name) for path in jobs_path.iterdir() if path.is_dir()),
+        default=0,
+    )
+
 
 def next_job_id(jobs_path: Path) -> str:
-    """Return the next sequential job id in the form run_<n>."""
-    if not jobs_path.exists():
-        return "run_1"
-
-    max_id = 0
-    for path in jobs_path.iterdir():
-        if not path.is_dir():
-            continue
-        if not path.name.startswith("run_"):
-            continue
-        suffix = path.name[4:]
-        if not suffix.isdigit():
-            continue
-        max_id = max(max_id, int(suffix))
-
-    return f"run_{max_id + 1}"
+    """Atomically allocate the next sequential job id in the form run_<n>."""
+    jobs_path.mkdir(parents=True, exist_ok=True)
+    fd = os.open(jobs_path / COUNTER_FILE_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        raw = os.read(fd, 32).strip()
+        current = int(raw) if raw.isdigit() else _highest_existing_run(jobs_path)
+        current += 1
+
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(current).encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    return f"run_{current}"
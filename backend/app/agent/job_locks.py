@@ -0,0 +1,57 @@
+"""Cross-process markers for running jobs.
+
+The job queue only knows about the jobs of its own process. While a job runs,
+the process running it holds an exclusive ``flock`` on
+``<jobs>/.locks/<job_id>.lock``, so the retention sweeper of any server
+process can tell the job is live before compacting or evicting it. The lock
+is released by the kernel if the process dies.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.config import settings
+
+LOCKS_DIR_NAME = ".locks"
+
+
+def _lock_path(job_id: str) -> Path:
+    return settings.remotion_jobs_path / LOCKS_DIR_NAME / f"{job_id}.lock"
+
+
+@contextmanager
+def hold(job_id: str) -> Iterator[None]:
+    """Mark *job_id* as running for as long as the block executes.
+
+    Each job id runs once, so the lock file is removed on exit; a sweeper
+    that opened it just before then simply sees the job as finished.
+    """
+    path = _lock_path(job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            path.unlink(missing_ok=True)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def is_held(job_id: str) -> bool:
+    """True while some process, this one included, is running *job_id*."""
+    try:
+        fd = os.open(_lock_path(job_id), os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+    return False
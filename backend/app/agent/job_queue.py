@@ -0,0 +1,500 @@
+"""In-process job queue that caps how many video jobs run at once.
+
+Job records, the concurrency cap, cancellation and job events all live in
+the serving process, so the backend must run as a single process (one
+uvicorn worker). :meth:`JobQueue.start` enforces this with an exclusive
+lock on the jobs directory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import StrEnum
+
+from app.agent import job_locks, metrics, orchestrator, result_index
+from app.agent.job_events import job_events
+from app.agent.observability import get_logfire
+from app.agent.video_styles import VideoStyle
+from app.config import settings
+
+
+class JobStatus(StrEnum):
+    """Lifecycle states of a queued video job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETE = "complete"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+_FINISHED = frozenset({JobStatus.COMPLETE, JobStatus.FAILED, JobStatus.CANCELLED})
+
+# Held by the one server process that owns the jobs directory.
+SERVER_LOCK_NAME = ".server.lock"
+
+# Stage reported by a running job between a cancel request and its teardown.
+CANCELLING_STAGE = "cancelling"
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class JobRecord:
+    """Status snapshot for a single video job."""
+
+    job_id: str
+    prompt: str
+    video_style: VideoStyle = VideoStyle.GENERAL
+    bypass_prompt_cache: bool = False
+    use_original_assets: bool = False
+    status: JobStatus = JobStatus.QUEUED
+    stage: str = ""
+    created_at: str = field(default_factory=_utc_now)
+    started_at: str = ""
+    finished_at: str = ""
+    output_path: str | None = None
+    job_project_path: str | None = None
+    hls_path: str | None = None
+    error: str | None = None
+    # Dedup key from result_index.request_key; None disables deduplication.
+    result_key: str | None = None
+    # Set when this job reuses another job's render instead of running.
+    source_job_id: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        """True once the job has reached a terminal status."""
+        return self.status in _FINISHED
+
+
+def _publish_status(record: JobRecord) -> None:
+    """Publish *record*'s status on its event stream, ending it once finished.
+
+    Terminal statuses are also counted in ``renderwood_jobs_total``.
+    """
+    job_events.publish(
+        record.job_id,
+        "status",
+        status=record.status,
+        stage=record.stage,
+        error=record.error,
+        output_path=record.output_path,
+        hls_path=record.hls_path,
+        source_job_id=record.source_job_id,
+    )
+    if record.finished:
+        job_events.close(record.job_id)
+        metrics.jobs_total.inc(status=record.status)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the queue cannot accept another job."""
+
+
+class ServerLockedError(RuntimeError):
+    """Raised when another server process already owns the jobs directory."""
+
+
+class JobQueue:
+    """Bounded FIFO of video jobs drained by a fixed pool of workers."""
+
+    def __init__(
+        self, max_workers: int, max_queued: int, max_records: int = 1000
+    ) -> None:
+        self._max_workers = max(1, max_workers)
+        self._max_queued = max(1, max_queued)
+        self._max_records = max(1, max_records)
+        self._queue: asyncio.Queue[str] | None = None
+        self._workers: list[asyncio.Task[None]] = []
+        self._records: dict[str, JobRecord] = {}
+        # result_key -> id of the queued/running job producing that result
+        self._inflight: dict[str, str] = {}
+        # job id -> ids of duplicate jobs waiting on its result
+        self._followers: dict[str, list[str]] = {}
+        # job id -> task running it, for cancellation
+        self._running: dict[str, asyncio.Task[None]] = {}
+        self._server_lock: int | None = None
+
+    async def start(self) -> None:
+        """Spawn the worker tasks. Safe to call once per event loop.
+
+        Raises ServerLockedError if another process is already serving jobs
+        from ``settings.remotion_jobs_path``: a second process would have
+        its own records and concurrency cap, so status lookups and cancels
+        routed to it would miss jobs and the cap would be multiplied.
+        """
+        if self._workers:
+            return
+        self._acquire_server_lock()
+        self._queue = asyncio.Queue(maxsize=self._max_queued)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{index}")
+            for index in range(self._max_workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks and wait for them to exit."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        if self._server_lock is not None:
+            os.close(self._server_lock)
+            self._server_lock = None
+
+    def _acquire_server_lock(self) -> None:
+        if self._server_lock is not None:
+            return
+        jobs_path = settings.remotion_jobs_path
+        jobs_path.mkdir(parents=True, exist_ok=True)
+        fd = os.open(jobs_path / SERVER_LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            owner = os.read(fd, 32).decode(errors="replace").strip() or "unknown"
+            os.close(fd)
+            raise ServerLockedError(
+                f"Another server process (pid {owner}) is already serving jobs "
+                f"from {jobs_path}. Run the backend as a single process, e.g. "
+                "uvicorn without --workers."
+            ) from None
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._server_lock = fd
+
+    def submit(
+        self,
+        record: JobRecord,
+        *,
+        reuse_results: bool = True,
+        finished_job_id: str | None = None,
+    ) -> JobRecord:
+        """Enqueue a job without waiting. Raises QueueFullError when full.
+
+        With *reuse_results*, a job whose ``result_key`` matches a running job
+        attaches to it, and otherwise one with a *finished_job_id* (the
+        caller's ``result_index.lookup`` of the key, done off the event loop)
+        completes at once from that render instead of being queued. If the
+        job it attached to fails, is cancelled or renders from different
+        uploads than the key described, it is re-queued to run on its own.
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        logfire = get_logfire()
+        key = record.result_key
+
+        if key and reuse_results:
+            primary_id = self._inflight.get(key)
+            if primary_id is not None:
+                record.source_job_id = primary_id
+                record.stage = "waiting_for_duplicate"
+                self._remember(record)
+                self._followers.setdefault(primary_id, []).append(record.job_id)
+                _publish_status(record)
+                logfire.info(
+                    "job_attached_to_duplicate",
+                    job_id=record.job_id,
+                    source_job_id=primary_id,
+                )
+                return record
+
+            source_id = finished_job_id
+            if source_id is not None:
+                self._remember(record)
+                self._complete_from(record, source_id)
+                _publish_status(record)
+                logfire.info(
+                    "job_served_from_result_index",
+                    job_id=record.job_id,
+                    source_job_id=source_id,
+                )
+                return record
+
+        try:
+            self._queue.put_nowait(record.job_id)
+        except asyncio.QueueFull as exc:
+            raise QueueFullError(
+                f"Job queue is full ({self._max_queued} jobs waiting)"
+            ) from exc
+
+        self._remember(record)
+        if key:
+            self._inflight[key] = record.job_id
+        _publish_status(record)
+        logfire.info(
+            "job_queued",
+            job_id=record.job_id,
+            queue_depth=self._queue.qsize(),
+        )
+        return record
+
+    def _remember(self, record: JobRecord) -> None:
+        """Track *record*, forgetting the oldest finished records over the cap.
+
+        Unfinished records are never dropped, so the map can only exceed
+        ``max_records`` while that many jobs are queued or running.
+        """
+        self._records[record.job_id] = record
+        excess = len(self._records) - self._max_records
+        if excess <= 0:
+            return
+        stale = [
+            job_id for job_id, known in self._records.items() if known.finished
+        ][:excess]
+        for job_id in stale:
+            del self._records[job_id]
+
+    def get(self, job_id: str) -> JobRecord | None:
+        """Return the record for *job_id*, or None if unknown."""
+        return self._records.get(job_id)
+
+    def is_active(self, job_id: str) -> bool:
+        """True while *job_id* is queued, waiting on a duplicate or running."""
+        record = self._records.get(job_id)
+        return record is not None and not record.finished
+
+    def status_counts(self) -> dict[str, float]:
+        """Return how many queued and running jobs there are."""
+        counts = {JobStatus.QUEUED.value: 0.0, JobStatus.RUNNING.value: 0.0}
+        for record in self._records.values():
+            if record.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+                counts[record.status.value] += 1
+        return counts
+
+    def list_jobs(self) -> list[JobRecord]:
+        """Return all known job records, newest first."""
+        return sorted(
+            self._records.values(), key=lambda r: r.created_at, reverse=True
+        )
+
+    def cancel(self, job_id: str) -> JobRecord | None:
+        """Cancel a queued, waiting or running job. Returns None if unknown.
+
+        A running job's task is cancelled, which tears down the agent session
+        and kills its render processes; its workspace is then deleted and the
+        worker picks up the next job. Until that finishes the job stays
+        running with stage ``"cancelling"``. Finished jobs are returned
+        unchanged.
+        """
+        record = self._records.get(job_id)
+        if record is None or record.finished:
+            return record
+
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+            record.stage = CANCELLING_STAGE
+            job_events.publish(job_id, "stage", stage=record.stage)
+            get_logfire().info("job_cancel_requested", job_id=job_id)
+            return record
+
+        # Still waiting in the queue or attached to a duplicate: the worker
+        # skips cancelled records when it dequeues them.
+        if record.source_job_id is not None:
+            followers = self._followers.get(record.source_job_id, [])
+            if job_id in followers:
+                followers.remove(job_id)
+        record.status = JobStatus.CANCELLED
+        record.finished_at = _utc_now()
+        _publish_status(record)
+        self._release(record)
+        get_logfire().info("job_cancelled", job_id=job_id, stage=record.stage)
+        return record
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            job_id = await queue.get()
+            try:
+                record = self._records.get(job_id)
+                if record is not None and record.status == JobStatus.QUEUED:
+                    await self._run_cancellable(record)
+            finally:
+                queue.task_done()
+
+    async def _run_cancellable(self, record: JobRecord) -> None:
+        task = asyncio.create_task(
+            self._execute(record), name=f"job-{record.job_id}"
+        )
+        self._running[record.job_id] = task
+        try:
+            await asyncio.wait({task})
+        finally:
+            self._running.pop(record.job_id, None)
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    async def _execute(self, record: JobRecord) -> None:
+        logfire = get_logfire()
+        record.status = JobStatus.RUNNING
+        record.started_at = _utc_now()
+        started = time.perf_counter()
+        _publish_status(record)
+
+        def on_stage(stage: str) -> None:
+            if record.stage == CANCELLING_STAGE:
+                return
+            record.stage = stage
+            job_events.publish(record.job_id, "stage", stage=stage)
+
+        rendered_key: str | None = None
+        # Marks the job live for retention sweeps in every server process.
+        with job_locks.hold(record.job_id):
+            try:
+                result = await orchestrator.run(
+                    record.job_id,
+                    record.prompt,
+                    video_style=record.video_style,
+                    use_prompt_cache=not record.bypass_prompt_cache,
+                    use_original_assets=record.use_original_assets,
+                    on_stage=on_stage,
+                )
+
+                if not result or not result.get("output_path"):
+                    raise RuntimeError("Agent execution returned no output")
+
+            except asyncio.CancelledError:
+                logfire.info("job_cancelled", job_id=record.job_id, stage=record.stage)
+                record.status = JobStatus.CANCELLED
+                await asyncio.to_thread(
+                    shutil.rmtree,
+                    settings.remotion_jobs_path / record.job_id,
+                    ignore_errors=True,
+                )
+            except Exception as exc:
+                logfire.error(
+                    "video_creation_failed",
+                    job_id=record.job_id,
+                    error=str(exc),
+                    error_type=type(exc).__name__,
+                )
+                record.status = JobStatus.FAILED
+                record.error = str(exc)
+            else:
+                record.status = JobStatus.COMPLETE
+                record.output_path = result["output_path"]
+                record.job_project_path = result["job_project_path"]
+                record.hls_path = result.get("hls_path")
+                # Index the render under the uploads it actually used, which
+                # may have changed since the job was submitted.
+                rendered_key = result.get("result_key")
+                if rendered_key:
+                    await asyncio.to_thread(
+                        result_index.record, rendered_key, record.job_id
+                    )
+            finally:
+                record.finished_at = _utc_now()
+                metrics.job_duration_seconds.observe(
+                    time.perf_counter() - started, status=record.status
+                )
+                _publish_status(record)
+                self._release(record, rendered_key)
+
+    def _release(self, record: JobRecord, rendered_key: str | None = None) -> None:
+        """Drop *record* from the in-flight map and resolve its followers.
+
+        Followers reuse the render only if *rendered_key*, the key of what
+        the job actually rendered, is the key they were matched on.
+        """
+        if record.result_key and self._inflight.get(record.result_key) == record.job_id:
+            del self._inflight[record.result_key]
+
+        reusable = (
+            record.status == JobStatus.COMPLETE
+            and rendered_key is not None
+            and rendered_key == record.result_key
+        )
+        for follower_id in self._followers.pop(record.job_id, []):
+            follower = self._records.get(follower_id)
+            if follower is None:
+                continue
+            if reusable:
+                self._complete_from(follower, record.job_id)
+                _publish_status(follower)
+            else:
+                self._requeue(follower, record)
+
+    def _requeue(self, follower: JobRecord, source: JobRecord) -> None:
+        """Run a follower whose source job cannot be reused as a job of its own.
+
+        The first follower re-queued for a key becomes the new in-flight job
+        for it; later followers of the same source attach to that one.
+        """
+        key = follower.result_key
+        primary_id = self._inflight.get(key) if key else None
+        if primary_id is not None:
+            follower.source_job_id = primary_id
+            self._followers.setdefault(primary_id, []).append(follower.job_id)
+            _publish_status(follower)
+            return
+
+        follower.source_job_id = None
+        follower.stage = ""
+        try:
+            if self._queue is None:
+                raise asyncio.QueueFull
+            self._queue.put_nowait(follower.job_id)
+        except asyncio.QueueFull:
+            follower.status = JobStatus.FAILED
+            follower.error = (
+                f"Source job {source.job_id} ({source.status}) could not be "
+                "reused and the queue is full, so this job could not be re-queued"
+            )
+            follower.finished_at = _utc_now()
+            _publish_status(follower)
+            return
+
+        if key:
+            self._inflight[key] = follower.job_id
+        _publish_status(follower)
+        get_logfire().info(
+            "job_requeued",
+            job_id=follower.job_id,
+            source_job_id=source.job_id,
+            source_status=source.status,
+        )
+
+    def _complete_from(self, record: JobRecord, source_job_id: str) -> None:
+        """Finish *record* by reusing the render of *source_job_id*."""
+        record.source_job_id = source_job_id
+        record.started_at = record.started_at or _utc_now()
+        try:
+            result = result_index.clone_result(source_job_id, record.job_id)
+        except OSError as exc:
+            record.status = JobStatus.FAILED
+            record.error = f"Could not reuse {source_job_id}: {exc}"
+        else:
+            record.status = JobStatus.COMPLETE
+            record.stage = ""
+            record.output_path = result["output_path"]
+            record.job_project_path = result["job_project_path"]
+            record.hls_path = result.get("hls_path")
+        finally:
+            record.finished_at = _utc_now()
+
+
+job_queue = JobQueue(
+    max_workers=settings.max_concurrent_jobs,
+    max_queued=settings.max_queued_jobs,
+    max_records=settings.max_job_records,
+)
+
+metrics.register_callback(
+    "renderwood_jobs_in_progress",
+    "Jobs currently known to the queue, by status.",
+    "gauge",
+    "status",
+    job_queue.status_counts,
+)
@@ -0,0 +1,427 @@
+"""Async ffmpeg and ffprobe helpers for processing media."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+from pathlib import Path
+
+THUMBNAIL_SEEK_SECONDS = 0.5
+IMAGE_THUMBNAIL_SIZE = 480
+FILMSTRIP_MAX_COLUMNS = 10
+
+# ffmpeg filters that apply each EXIF orientation (2-8) to the stored pixels.
+_ORIENTATION_FILTERS = {
+    2: "hflip",
+    3: "hflip,vflip",
+    4: "vflip",
+    5: "transpose=cclock_flip",
+    6: "transpose=clock",
+    7: "transpose=clock_flip",
+    8: "transpose=cclock",
+}
+_EXIF_SCAN_BYTES = 64 * 1024
+
+
+async def run_ffmpeg(args: list[str]) -> bool:
+    """Run ``ffmpeg`` with *args* without blocking the event loop.
+
+    Returns True when ffmpeg exits successfully.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-y",
+            "-nostdin",
+            *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return False
+
+    try:
+        return await process.wait() == 0
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+
+
+async def run_ffprobe(args: list[str]) -> str | None:
+    """Run ``ffprobe`` with *args* and return its stdout, or None on failure."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe",
+            "-v",
+            "error",
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+
+    try:
+        stdout, _ = await process.communicate()
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    if process.returncode != 0:
+        return None
+    return stdout.decode("utf-8", errors="replace")
+
+
+async def probe_duration(path: Path) -> float | None:
+    """Return the container duration of *path* in seconds, or None."""
+    output = await run_ffprobe([
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        str(path),
+    ])
+    try:
+        return float(output.strip()) if output else None
+    except ValueError:
+        return None
+
+
+def _frame_rate(value: str | None) -> float | None:
+    """Parse an ffprobe rational frame rate such as ``30000/1001``."""
+    if not value:
+        return None
+    numerator, _, denominator = value.partition("/")
+    try:
+        rate = float(numerator) / float(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(rate, 3) if rate > 0 else None
+
+
+def _rotation(stream: dict) -> int:
+    """Return a video stream's display rotation as 0, 90, 180 or 270."""
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            return round(float(side_data["rotation"])) % 360
+    rotate = stream.get("tags", {}).get("rotate")
+    try:
+        return round(float(rotate)) % 360 if rotate else 0
+    except ValueError:
+        return 0
+
+
+def _float(value: object) -> float | None:
+    try:
+        return round(float(value), 3)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_still_image(format_name: str) -> bool:
+    """True for ffprobe's single-image demuxers (``png_pipe``, ``image2``...)."""
+    return format_name == "image2" or format_name.endswith("_pipe")
+
+
+async def probe_media(path: Path) -> dict | None:
+    """Return the facts a video edit needs about *path*, or None if unreadable.
+
+    Keys: ``duration_seconds``, ``width``, ``height`` (as displayed, i.e.
+    after rotation), ``fps``, ``video_codec``, ``audio_codec``, ``has_audio``
+    and ``rotation``. Keys that do not apply (e.g. fps for a still image) are
+    None.
+    """
+    output = await run_ffprobe([
+        "-show_format",
+        "-show_streams",
+        "-of",
+        "json",
+        str(path),
+    ])
+    if output is None:
+        return None
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError:
+        return None
+
+    streams = data.get("streams", [])
+    video = next(
+        (
+            stream
+            for stream in streams
+            if stream.get("codec_type") == "video"
+            and not stream.get("disposition", {}).get("attached_pic")
+        ),
+        None,
+    )
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    if video is None and audio is None:
+        return None
+
+    rotation = _rotation(video) if video else 0
+    width = video.get("width") if video else None
+    height = video.get("height") if video else None
+    if rotation in (90, 270):
+        width, height = height, width
+
+    container = data.get("format", {})
+    duration = _float(container.get("duration"))
+    fps = None
+    if _is_still_image(container.get("format_name", "")):
+        duration = None
+    elif video is not None and duration is not None:
+        fps = _frame_rate(video.get("avg_frame_rate")) or _frame_rate(
+            video.get("r_frame_rate")
+        )
+
+    return {
+        "duration_seconds": duration,
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "video_codec": video.get("codec_name") if video else None,
+        "audio_codec": audio.get("codec_name") if audio else None,
+        "has_audio": audio is not None,
+        "rotation": rotation,
+    }
+
+
+async def generate_video_thumbnail(src: Path, dest: Path) -> bool:
+    """Write a JPEG frame from *src* at THUMBNAIL_SEEK_SECONDS to *dest*."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    ok = await run_ffmpeg([
+        "-ss",
+        str(THUMBNAIL_SEEK_SECONDS),
+        "-i",
+        str(src),
+        "-frames:v",
+        "1",
+        "-q:v",
+        "2",
+        str(dest),
+    ])
+    return ok and dest.exists()
+
+
+async def transcode_proxy(
+    src: Path,
+    dest: Path,
+    *,
+    max_width: int,
+    max_height: int,
+    fps: float,
+    keyframe_interval: int,
+    crf: int,
+) -> bool:
+    """Write an H.264 MP4 of *src* that is cheap to seek frame-accurately.
+
+    The picture is scaled down (never up) to fit *max_width* x *max_height*,
+    resampled to a constant *fps*, and given a keyframe every
+    *keyframe_interval* frames.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    scale = (
+        f"scale=w='min({max_width},iw)':h='min({max_height},ih)'"
+        ":force_original_aspect_ratio=decrease:force_divisible_by=2"
+    )
+    ok = await run_ffmpeg([
+        "-i",
+        str(src),
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a:0?",
+        "-vf",
+        f"{scale},fps={fps}",
+        "-fps_mode",
+        "cfr",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-crf",
+        str(crf),
+        "-pix_fmt",
+        "yuv420p",
+        "-g",
+        str(keyframe_interval),
+        "-keyint_min",
+        str(keyframe_interval),
+        "-sc_threshold",
+        "0",
+        "-c:a",
+        "aac",
+        "-b:a",
+        "192k",
+        "-movflags",
+        "+faststart",
+        "-f",
+        "mp4",
+        str(dest),
+    ])
+    return ok and dest.exists()
+
+
+def _tiff_orientation(tiff: bytes) -> int:
+    """Read the Orientation tag (0x0112) from IFD0 of an EXIF TIFF block."""
+    order = {b"II": "little", b"MM": "big"}.get(tiff[:2])
+    if order is None:
+        return 1
+    ifd = int.from_bytes(tiff[4:8], order)
+    count = int.from_bytes(tiff[ifd : ifd + 2], order)
+    for index in range(count):
+        entry = tiff[ifd + 2 + 12 * index : ifd + 14 + 12 * index]
+        if len(entry) < 12:
+            break
+        if int.from_bytes(entry[:2], order) == 0x0112:
+            value = int.from_bytes(entry[8:10], order)
+            return value if 1 <= value <= 8 else 1
+    return 1
+
+
+def exif_orientation(path: Path) -> int:
+    """Return the EXIF orientation (1-8) of a JPEG, or 1 if it has none."""
+    try:
+        with path.open("rb") as fh:
+            data = fh.read(_EXIF_SCAN_BYTES)
+    except OSError:
+        return 1
+    if not data.startswith(b"\xff\xd8"):
+        return 1
+
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker in (0xD9, 0xDA):  # end of image / start of scan
+            break
+        length = int.from_bytes(data[pos + 2 : pos + 4], "big")
+        segment = data[pos + 4 : pos + 2 + length]
+        if marker == 0xE1 and segment.startswith(b"Exif\0\0"):
+            return _tiff_orientation(segment[6:])
+        pos += 2 + length
+    return 1
+
+
+async def scale_image(
+    src: Path,
+    dest: Path,
+    *,
+    max_width: int,
+    max_height: int,
+    codec_args: list[str],
+) -> bool:
+    """Write a single-frame copy of *src* scaled down to fit the box.
+
+    The box is turned to match the image, so a portrait photo fits
+    *max_height* x *max_width*. EXIF orientation is baked into the pixels,
+    since the encoded copy carries no EXIF. *codec_args* selects the output
+    encoder, e.g. ``["-c:v", "png"]``.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    long_side, short_side = max(max_width, max_height), min(max_width, max_height)
+    filters = [
+        f"scale=w='if(gte(iw,ih),min({long_side},iw),min({short_side},iw))'"
+        f":h='if(gte(iw,ih),min({short_side},ih),min({long_side},ih))'"
+        ":force_original_aspect_ratio=decrease"
+    ]
+    orientation = _ORIENTATION_FILTERS.get(exif_orientation(src))
+    if orientation:
+        filters.insert(0, orientation)
+    ok = await run_ffmpeg([
+        "-noautorotate",
+        "-i",
+        str(src),
+        "-vf",
+        ",".join(filters),
+        "-frames:v",
+        "1",
+        "-update",
+        "1",
+        *codec_args,
+        "-f",
+        "image2",
+        str(dest),
+    ])
+    return ok and dest.exists()
+
+
+async def generate_image_thumbnail(src: Path, dest: Path) -> bool:
+    """Write a JPEG of *src* no larger than IMAGE_THUMBNAIL_SIZE to *dest*."""
+    return await scale_image(
+        src,
+        dest,
+        max_width=IMAGE_THUMBNAIL_SIZE,
+        max_height=IMAGE_THUMBNAIL_SIZE,
+        codec_args=["-c:v", "mjpeg", "-q:v", "4"],
+    )
+
+
+async def generate_filmstrip(
+    src: Path,
+    dest: Path,
+    *,
+    duration: float,
+    width: int,
+    height: int,
+    frame_count: int,
+    tile_width: int,
+) -> dict | None:
+    """Write a JPEG sprite sheet of *frame_count* evenly spaced frames of *src*.
+
+    Frames are taken at the middle of each of *frame_count* equal slices of
+    *duration* and laid out left to right, top to bottom, at most
+    FILMSTRIP_MAX_COLUMNS per row. *width* and *height* are the displayed
+    size of the video, used to keep its aspect ratio. Returns the sheet's
+    index (tile size, grid and each frame's timestamp and offset) or None if
+    ffmpeg failed.
+    """
+    frame_count = max(1, frame_count)
+    interval = duration / frame_count
+    tile_height = max(2, round(tile_width * height / width / 2) * 2)
+    columns = min(frame_count, FILMSTRIP_MAX_COLUMNS)
+    rows = math.ceil(frame_count / columns)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    ok = await run_ffmpeg([
+        "-ss",
+        f"{interval / 2:.3f}",
+        "-i",
+        str(src),
+        "-an",
+        "-vf",
+        f"fps={1 / interval:.6f},scale={tile_width}:{tile_height},"
+        f"tile={columns}x{rows}",
+        "-frames:v",
+        "1",
+        "-update",
+        "1",
+        "-q:v",
+        "4",
+        "-f",
+        "image2",
+        str(dest),
+    ])
+    if not (ok and dest.exists()):
+        return None
+
+    return {
+        "duration_seconds": duration,
+        "tile_width": tile_width,
+        "tile_height": tile_height,
+        "columns": columns,
+        "rows": rows,
+        "frames": [
+            {
+                "index": index,
+                "time": round(interval * (index + 0.5), 3),
+                "x": (index % columns) * tile_width,
+                "y": (index // columns) * tile_height,
+            }
+            for index in range(frame_count)
+        ],
+    }
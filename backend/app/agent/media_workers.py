@@ -0,0 +1,57 @@
+"""Background worker pool for media processing (thumbnails, probes, etc.)."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from app.agent.observability import get_logfire
+from app.config import settings
+
+
+class MediaWorkerPool:
+    """Runs media jobs as background tasks, at most *concurrency* at a time."""
+
+    def __init__(self, concurrency: int) -> None:
+        self._concurrency = max(1, concurrency)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def submit(
+        self, job: Callable[[], Awaitable[None]], *, name: str
+    ) -> asyncio.Task[None]:
+        """Schedule *job* to run once a worker slot is free."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        task = asyncio.create_task(self._run(job, name), name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def stop(self) -> None:
+        """Cancel outstanding media jobs."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: Callable[[], Awaitable[None]], name: str) -> None:
+        assert self._semaphore is not None
+        logfire = get_logfire()
+        async with self._semaphore:
+            with logfire.span("media_job", job_name=name):
+                try:
+                    await job()
+                except Exception as exc:
+                    logfire.error(
+                        "media_job_failed",
+                        job_name=name,
+                        error=str(exc),
+                        error_type=type(exc).__name__,
+                    )
+
+
+media_workers = MediaWorkerPool(settings.media_worker_concurrency)
+# Proxy encodes take far longer than thumbnails and filmstrips, so they get
+# their own pool and never hold up the previews the UI is waiting on.
+proxy_workers = MediaWorkerPool(settings.proxy_worker_concurrency)
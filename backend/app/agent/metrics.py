@@ -0,0 +1,290 @@
+"""In-process counters and histograms exposed in Prometheus text format.
+
+Spans in logfire describe single jobs; these aggregates answer fleet-level
+questions such as the p95 of each pipeline stage. Values live in memory and
+reset when the process restarts, which Prometheus handles as a counter reset.
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable, Sequence
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800
+)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 20, 30, 50)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    @abc.abstractmethod
+    def render(self) -> list[str]:
+        """Return the metric's exposition lines, header included."""
+
+
+class Counter(_Metric):
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in values
+        ]
+
+
+class Histogram(_Metric):
+    """Bucketed observations with a running sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._bounds = tuple(sorted(buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._series: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            counts, total = self._series.get(key) or (
+                [0] * (len(self._bounds) + 1),
+                0.0,
+            )
+            counts[index] += 1
+            self._series[key] = (counts, total + value)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = sorted(
+                (key, list(counts), total)
+                for key, (counts, total) in self._series.items()
+            )
+        lines = self._header()
+        bucket_names = (*self.labelnames, "le")
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self._bounds, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(bucket_names, (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """A metric whose samples are read from *collect* at scrape time.
+
+    *collect* returns a mapping of the single label's value to the sample,
+    which lets modules that already keep their own tallies (the prompt
+    cache, the job queue) expose them without double bookkeeping.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        kind: str,
+        labelname: str,
+        collect: Callable[[], dict[str, float]],
+    ) -> None:
+        super().__init__(name, help_text, (labelname,))
+        self.kind = kind
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, (label,))} "
+            f"{_format_value(value)}"
+            for label, value in sorted(self._collect().items())
+        ]
+
+
+class StageClock:
+    """Times consecutive pipeline stages into a ``stage``/``outcome`` histogram.
+
+    Starting a stage closes the previous one as successful; :meth:`stop`
+    closes the current stage with the given outcome.
+    """
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+        self._stage: str | None = None
+        self._started = 0.0
+
+    def start(self, stage: str) -> None:
+        self.stop("ok")
+        self._stage = stage
+        self._started = time.perf_counter()
+
+    def stop(self, outcome: str) -> None:
+        if self._stage is None:
+            return
+        elapsed = time.perf_counter() - self._started
+        self._histogram.observe(elapsed, stage=self._stage, outcome=outcome)
+        self._stage = None
+
+
+class Registry:
+    """The set of metrics rendered by ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _registered(metrics: Iterable[_Metric]) -> None:
+    for metric in metrics:
+        registry.register(metric)
+
+
+def register_callback(
+    name: str,
+    help_text: str,
+    kind: str,
+    labelname: str,
+    collect: Callable[[], dict[str, float]],
+) -> None:
+    """Expose tallies kept elsewhere as a metric read at scrape time."""
+    registry.register(CallbackMetric(name, help_text, kind, labelname, collect))
+
+
+def render_latest() -> str:
+    """Return every registered metric in Prometheus text format."""
+    return registry.render()
+
+
+stage_duration_seconds = Histogram(
+    "renderwood_stage_duration_seconds",
+    "Duration of each orchestrator pipeline stage.",
+    ("stage", "outcome"),
+)
+job_duration_seconds = Histogram(
+    "renderwood_job_duration_seconds",
+    "Wall time of executed jobs from start to a terminal status.",
+    ("status",),
+)
+jobs_total = Counter(
+    "renderwood_jobs_total",
+    "Jobs that reached a terminal status, including reused renders.",
+    ("status",),
+)
+agent_turns_per_job = Histogram(
+    "renderwood_agent_turns_per_job",
+    "Assistant turns taken by the agent in each job.",
+    buckets=COUNT_BUCKETS,
+)
+tool_call_duration_seconds = Histogram(
+    "renderwood_tool_call_duration_seconds",
+    "Time from an agent tool call to its result, by tool name.",
+    ("tool",),
+)
+render_duration_seconds = Histogram(
+    "renderwood_render_duration_seconds",
+    "Duration of agent render calls (remotion render or render_video).",
+    ("outcome",),
+)
+uploads_total = Counter(
+    "renderwood_uploads_total",
+    "Uploads accepted, by whether the content was new or a duplicate.",
+    ("result",),
+)
+upload_bytes_total = Counter(
+    "renderwood_upload_bytes_total",
+    "Bytes received in accepted uploads.",
+)
+thumbnail_duration_seconds = Histogram(
+    "renderwood_thumbnail_duration_seconds",
+    "Time spent generating upload thumbnails.",
+    ("outcome",),
+)
+
+_registered([
+    stage_duration_seconds,
+    job_duration_seconds,
+    jobs_total,
+    agent_turns_per_job,
+    tool_call_duration_seconds,
+    render_duration_seconds,
+    uploads_total,
+    upload_bytes_total,
+    thumbnail_duration_seconds,
+])
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
-import shutil
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing, asynccontextmanager
 from pathlib import Path
 
 from claude_agent_sdk import (
@@ -14,88 +17,295 @@ from claude_agent_sdk import (
     ThinkingBlock,
     ToolResultBlock,
     ToolUseBlock,
+    UserMessage,
 )
 
+from app.agent import metrics, result_index
+from app.agent.agent_tools import (
+    RENDER_VIDEO_TOOL,
+    TOOLS_SERVER_NAME,
+    build_agent_tools,
+)
+from app.agent.bundle_cache import bundle_env
+from app.agent.job_events import job_events
+from app.agent.media_processing import probe_duration
 from app.agent.observability import get_logfire
+from app.agent.packaging import package_hls, remux_faststart
 from app.agent.prompt_enhancer import enhance_prompt
+from app.agent.preview_render import discard_previews
 from app.agent.prompts import REMOTION_AGENT_SYSTEM_PROMPT
+from app.agent.publishing import publish_output
+from app.agent.render_progress import (
+    RENDER_LOG_NAME,
+    RenderProgressTracker,
+    follow_render_log,
+)
+from app.agent.subprocesses import kill_processes_in
 from app.agent.upload_assets import (
     collect_asset_summaries,
     copy_uploads_to_job,
     format_assets_context,
 )
 from app.agent.video_styles import VideoStyle
+from app.agent.workspaces import workspace_pool
 from app.config import settings
 
+StageCallback = Callable[[str], None]
+
+TURN_SUMMARY_MAX_CHARS = 500
+
+
+class StageTimeoutError(TimeoutError):
+    """Raised when a pipeline stage or the whole job exceeds its deadline."""
+
+
+@asynccontextmanager
+async def _deadline(stage: str, seconds: float) -> AsyncIterator[None]:
+    """Cancel the enclosed work after *seconds* and report which stage overran."""
+    try:
+        async with asyncio.timeout(seconds):
+            yield
+    except StageTimeoutError:
+        # A nested stage already overran and named itself; keep its label.
+        raise
+    except TimeoutError as exc:
+        get_logfire().error("stage_timeout", stage=stage, timeout_seconds=seconds)
+        raise StageTimeoutError(f"{stage} exceeded its {seconds}s deadline") from exc
+
+
 async def run(
     job_id: str,
     prompt: str,
     video_style: VideoStyle = VideoStyle.GENERAL,
+    use_prompt_cache: bool = True,
+    on_stage: StageCallback | None = None,
+    use_original_assets: bool = False,
 ) -> dict[str, str]:
-    """Run a Remotion job and return output paths."""
+    """Run a Remotion job and return output paths.
+
+    *on_stage* is called with the name of each pipeline stage as it starts so
+    callers such as the job queue can report progress. Uploaded video and
+    oversized images are linked in as their render proxies unless
+    *use_original_assets* is set. The job is bounded by
+    ``settings.max_job_timeout`` overall and by a deadline per stage. If it
+    fails, times out or is cancelled, every process still running inside the
+    job directory (renderer, Chrome, ffmpeg) is killed.
+
+    The result includes ``result_key``, the result-index key for the uploads
+    the job actually linked, unless the request cannot be keyed.
+    """
     logfire = get_logfire()
+    clock = metrics.StageClock(metrics.stage_duration_seconds)
+
+    def report(stage: str) -> None:
+        clock.start(stage)
+        if on_stage is not None:
+            on_stage(stage)
+
     with logfire.span(
         "remotion_video_generation",
         job_id=job_id,
         user_prompt=prompt,
         video_style=video_style.value,
     ):
-        job_dir, output_dir = _setup_job_directory(job_id)
-
-        summaries = collect_asset_summaries()
-        assets_context = format_assets_context(summaries)
-
-        if summaries:
-            copy_uploads_to_job(job_dir)
+        try:
+            async with _deadline("job", settings.max_job_timeout):
+                result = await _run_stages(
+                    job_id,
+                    prompt,
+                    video_style,
+                    use_prompt_cache,
+                    use_original_assets,
+                    report,
+                )
+            clock.stop("ok")
+            return result
+        except BaseException as exc:
+            clock.stop(_outcome(exc))
+            killed = kill_processes_in(settings.remotion_jobs_path / job_id)
+            if killed:
+                logfire.warn("job_processes_killed", job_id=job_id, count=killed)
+            raise
+
+
+def _outcome(exc: BaseException) -> str:
+    """Classify how a stage ended, for the stage duration histogram."""
+    if isinstance(exc, asyncio.CancelledError):
+        return "cancelled"
+    if isinstance(exc, StageTimeoutError):
+        return "timeout"
+    return "error"
+
+
+async def _run_stages(
+    job_id: str,
+    prompt: str,
+    video_style: VideoStyle,
+    use_prompt_cache: bool,
+    use_original_assets: bool,
+    report: StageCallback,
+) -> dict[str, str]:
+    logfire = get_logfire()
 
-        enhanced_prompt = await enhance_prompt(
-            prompt, style=video_style, assets_context=assets_context,
-        )
-        agent_prompt = _build_agent_prompt(enhanced_prompt, assets_context)
+    report("prepare_job")
+    (
+        job_dir,
+        output_dir,
+        result_key,
+        enhanced_prompt,
+        assets_context,
+    ) = await _prepare_job(
+        job_id, prompt, video_style, use_prompt_cache, use_original_assets
+    )
+    agent_prompt = _build_agent_prompt(enhanced_prompt, assets_context)
 
-        options = _build_agent_options(job_dir)
+    progress = RenderProgressTracker(
+        lambda data: job_events.publish(job_id, "render_progress", **data)
+    )
+    options = _build_agent_options(job_dir, progress)
+
+    report("agent_execution")
+    try:
+        async with _deadline("agent_execution", settings.max_render_timeout):
+            job_output_path = await _run_agent(
+                agent_prompt, options, output_dir, job_id, progress
+            )
+    finally:
+        await discard_previews(job_dir)
+
+    report("validate_output")
+    _validate_output(job_output_path)
+
+    report("package_output")
+    async with _deadline("package_output", settings.packaging_timeout):
+        playable_path = await _faststart_output(job_output_path)
+        final_output_path = await publish_output(playable_path, job_id)
+    hls_playlist = (
+        await _package_hls(final_output_path, job_id)
+        if settings.hls_enabled
+        else None
+    )
 
-        job_output_path = await _run_agent(agent_prompt, options, output_dir)
+    logfire.info(
+        "video_generation_complete",
+        job_id=job_id,
+        output_path=str(final_output_path),
+    )
 
-        _validate_output(job_output_path)
+    result = {
+        "output_path": str(final_output_path),
+        "job_project_path": str(job_dir),
+    }
+    if hls_playlist is not None:
+        result["hls_path"] = str(hls_playlist)
+    if result_key is not None:
+        result["result_key"] = result_key
+    return result
+
+
+@asynccontextmanager
+async def _substage(stage: str, **attributes: object) -> AsyncIterator[None]:
+    """Trace and time one step of a stage whose steps run concurrently."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        with get_logfire().span(stage, **attributes):
+            yield
+    except BaseException as exc:
+        outcome = _outcome(exc)
+        raise
+    finally:
+        metrics.stage_duration_seconds.observe(
+            time.perf_counter() - started, stage=stage, outcome=outcome
+        )
 
-        final_output_path = copy_output_to_final(job_output_path, job_id)
 
-        logfire.info(
-            "video_generation_complete",
-            job_id=job_id,
-            output_path=str(final_output_path),
+async def _prepare_job(
+    job_id: str,
+    prompt: str,
+    video_style: VideoStyle,
+    use_prompt_cache: bool,
+    use_original_assets: bool,
+) -> tuple[Path, Path, str | None, str, str]:
+    """Run the pre-agent steps as two concurrent branches.
+
+    The filesystem branch builds the workspace and then links the uploads
+    into it, in worker threads. The prompt branch reads the asset catalog and
+    then calls the prompt enhancer. Returns the job and output directories,
+    the result-index key for the linked uploads, the enhanced prompt and the
+    assets context.
+
+    If either branch fails, the prompt branch is cancelled but the
+    filesystem branch is allowed to finish, because its threads cannot be
+    interrupted and cleanup must not race them.
+    """
+
+    async def prepare_workspace() -> tuple[Path, Path, str | None]:
+        async with _substage("setup_job_directory", job_id=job_id):
+            job_dir, output_dir = await asyncio.to_thread(
+                _setup_job_directory, job_id
+            )
+        async with _substage("copy_uploads", job_id=job_id):
+            linked = await asyncio.to_thread(
+                copy_uploads_to_job, job_dir, use_proxies=not use_original_assets
+            )
+        result_key = await asyncio.to_thread(
+            result_index.request_key, prompt, video_style, linked
         )
-
-        return {
-            "output_path": str(final_output_path),
-            "job_project_path": str(job_dir),
-        }
+        return job_dir, output_dir, result_key
+
+    async def prepare_prompt() -> tuple[str, str]:
+        async with _substage("collect_assets"):
+            summaries = await asyncio.to_thread(
+                collect_asset_summaries, use_proxies=not use_original_assets
+            )
+            assets_context = format_assets_context(summaries)
+        try:
+            async with (
+                _substage("enhance_prompt", video_style=video_style.value),
+                _deadline("prompt_enhancement", settings.prompt_enhancement_timeout),
+            ):
+                enhanced_prompt = await enhance_prompt(
+                    prompt,
+                    style=video_style,
+                    assets_context=assets_context,
+                    use_cache=use_prompt_cache,
+                )
+        except StageTimeoutError:
+            # Enhancement is optional: render from the user's own prompt
+            get_logfire().warn("prompt_enhancement_skipped", job_id=job_id)
+            enhanced_prompt = prompt
+        return enhanced_prompt, assets_context
+
+    workspace = asyncio.create_task(prepare_workspace())
+    brief = asyncio.create_task(prepare_prompt())
+    try:
+        (job_dir, output_dir, result_key), (enhanced_prompt, assets_context) = (
+            await asyncio.gather(asyncio.shield(workspace), brief)
+        )
+    except BaseException:
+        brief.cancel()
+        await asyncio.gather(workspace, brief, return_exceptions=True)
+        raise
+    return job_dir, output_dir, result_key, enhanced_prompt, assets_context
 
 
 def _setup_job_directory(job_id: str) -> tuple[Path, Path]:
-    """Create the job directory and output folder."""
-    logfire = get_logfire()
-    with logfire.span("setup_job_directory", job_id=job_id):
-        job_dir = settings.remotion_jobs_path / job_id
-        output_dir = job_dir / "output"
-
-        shutil.copytree(
-            settings.remotion_project_path,
-            job_dir,
-            symlinks=True,
-            dirs_exist_ok=False,
-        )
+    """Create the job directory and output folder. Blocking; run in a thread."""
+    job_dir = settings.remotion_jobs_path / job_id
+    output_dir = job_dir / "output"
 
-        output_dir.mkdir(parents=True, exist_ok=True)
+    workspace_pool.acquire(job_dir)
 
-        logfire.info(
-            "job_directory_created",
-            job_dir=str(job_dir),
-            output_dir=str(output_dir),
-        )
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-        return job_dir, output_dir
+    get_logfire().info(
+        "job_directory_created",
+        job_dir=str(job_dir),
+        output_dir=str(output_dir),
+    )
+
+    return job_dir, output_dir
 
 
 def _build_agent_prompt(user_prompt: str, assets_context: str = "") -> str:
@@ -104,9 +314,28 @@ def _build_agent_prompt(user_prompt: str, assets_context: str = "") -> str:
         f"User request: {user_prompt}\n\n"
         "The Remotion project is in the current directory. "
         "Edit the source files, then render the video. "
-        "The final output file MUST be saved to: output/video.mp4.",
+        "The final output file MUST be saved to: output/video.mp4. "
+        "The job ends as soon as a valid output/video.mp4 has been rendered, "
+        "so only render it once you are satisfied with the result. "
+        "To check your work first, use the preview_frames tool, which returns "
+        "low-resolution stills at frames or timestamps you choose in seconds; "
+        "do not run full renders just to inspect the video.",
     ]
 
+    if settings.render_mode == "chunked":
+        parts.append(
+            "\n\nRender with the render_video tool, passing the composition id "
+            "and its durationInFrames, instead of running `npx remotion render` "
+            "yourself. It renders in parallel and writes output/video.mp4."
+        )
+    else:
+        parts.append(
+            "\n\nWhen rendering, tee the render output to "
+            f"output/{RENDER_LOG_NAME} so progress can be reported, e.g. "
+            "`set -o pipefail; npx remotion render <CompositionId> "
+            f"output/video.mp4 2>&1 | tee output/{RENDER_LOG_NAME}`."
+        )
+
     if assets_context:
         parts.append(
             "\n\nUploaded assets are available in public/ and can be "
@@ -117,17 +346,23 @@ def _build_agent_prompt(user_prompt: str, assets_context: str = "") -> str:
     return "".join(parts)
 
 
-def _build_agent_options(job_dir: Path) -> ClaudeAgentOptions:
+def _build_agent_options(
+    job_dir: Path, progress: RenderProgressTracker | None = None
+) -> ClaudeAgentOptions:
     """Build agent configuration options."""
+    tools_server, tool_names = build_agent_tools(job_dir, progress)
     return ClaudeAgentOptions(
         system_prompt=REMOTION_AGENT_SYSTEM_PROMPT,
         setting_sources=["user", "project"],
-        allowed_tools=["Skill", "Read", "Write", "Edit", "Bash", "Glob", "Grep"],
+        mcp_servers={TOOLS_SERVER_NAME: tools_server},
+        allowed_tools=[
+            "Skill", "Read", "Write", "Edit", "Bash", "Glob", "Grep", *tool_names
+        ],
         cwd=str(job_dir),
         permission_mode="bypassPermissions",
         max_turns=30,
         model=settings.claude_model,
-        env={"ANTHROPIC_API_KEY": settings.anthropic_api_key},
+        env={"ANTHROPIC_API_KEY": settings.anthropic_api_key, **bundle_env()},
     )
 
 
@@ -135,29 +370,141 @@ async def _run_agent(
     prompt: str,
     options: ClaudeAgentOptions,
     output_dir: Path,
+    job_id: str,
+    progress: RenderProgressTracker,
 ) -> Path:
-    """Run the agent and return the expected output path."""
+    """Run the agent and return the expected output path.
+
+    The session is closed as soon as ``output/video.mp4`` validates with no
+    tool call still running, rather than waiting for the agent's closing
+    turn.
+    """
     logfire = get_logfire()
     with logfire.span("agent_execution"):
         turn_count = 0
-        result_received = False
+        tool_calls = _ToolCallTimer()
+        output = _OutputWatcher(output_dir / "video.mp4")
+        log_follower = asyncio.create_task(
+            follow_render_log(output_dir / RENDER_LOG_NAME, progress)
+        )
+
+        try:
+            async with ClaudeSDKClient(options=options) as client:
+                await client.query(prompt)
+
+                async with aclosing(client.receive_response()) as messages:
+                    async for message in messages:
+                        if isinstance(message, AssistantMessage):
+                            turn_count += 1
+                            _log_assistant_message(message, turn_count)
+                            _publish_turn_summary(job_id, message, turn_count)
+                            tool_calls.started(message)
+
+                        elif isinstance(message, UserMessage):
+                            tool_calls.finished(message)
+                            if not tool_calls.pending and await output.valid():
+                                logfire.info(
+                                    "agent_stopped_after_render",
+                                    turn_count=turn_count,
+                                )
+                                break
+
+                        elif isinstance(message, ResultMessage):
+                            _handle_result_message(message, turn_count, output_dir)
+                            break
+        finally:
+            log_follower.cancel()
+            await asyncio.gather(log_follower, return_exceptions=True)
+            metrics.agent_turns_per_job.observe(turn_count)
 
-        async with ClaudeSDKClient(options=options) as client:
-            await client.query(prompt)
+        return output_dir / "video.mp4"
 
-            async for message in client.receive_response():
-                if result_received:
-                    continue
 
-                if isinstance(message, AssistantMessage):
-                    turn_count += 1
-                    _log_assistant_message(message, turn_count)
+class _OutputWatcher:
+    """Checks whether the agent's output video exists and is playable.
 
-                elif isinstance(message, ResultMessage):
-                    _handle_result_message(message, turn_count, output_dir)
-                    result_received = True
+    ffprobe only runs when the file's size or mtime changed since the last
+    check, so polling after every tool result stays cheap.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._signature: tuple[int, int] | None = None
+        self._valid = False
+
+    async def valid(self) -> bool:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return False
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if signature != self._signature:
+            self._signature = signature
+            duration = await probe_duration(self._path) if stat.st_size else None
+            self._valid = bool(duration and duration > 0)
+        return self._valid
+
+
+def _is_render_call(block: ToolUseBlock) -> bool:
+    """True if *block* renders the final video (CLI render or render_video)."""
+    if block.name == RENDER_VIDEO_TOOL:
+        return True
+    command = block.input.get("command", "") if block.name == "Bash" else ""
+    return "remotion render" in command
 
-        return output_dir / "video.mp4"
+
+class _ToolCallTimer:
+    """Matches agent tool calls to their results and records their durations."""
+
+    def __init__(self) -> None:
+        # tool_use id -> (tool name, is render call, start time)
+        self._pending: dict[str, tuple[str, bool, float]] = {}
+
+    @property
+    def pending(self) -> bool:
+        """True while any tool call is still awaiting its result."""
+        return bool(self._pending)
+
+    def started(self, message: AssistantMessage) -> None:
+        now = time.perf_counter()
+        for block in message.content:
+            if isinstance(block, ToolUseBlock):
+                self._pending[block.id] = (block.name, _is_render_call(block), now)
+
+    def finished(self, message: UserMessage) -> None:
+        if isinstance(message.content, str):
+            return
+        now = time.perf_counter()
+        for block in message.content:
+            if not isinstance(block, ToolResultBlock):
+                continue
+            pending = self._pending.pop(block.tool_use_id, None)
+            if pending is None:
+                continue
+            name, is_render, started = pending
+            metrics.tool_call_duration_seconds.observe(now - started, tool=name)
+            if is_render:
+                metrics.render_duration_seconds.observe(
+                    now - started, outcome="error" if block.is_error else "ok"
+                )
+
+
+def _publish_turn_summary(
+    job_id: str, message: AssistantMessage, turn_count: int
+) -> None:
+    """Publish a compact summary of an agent turn on the job's event stream."""
+    text = " ".join(
+        block.text for block in message.content if isinstance(block, TextBlock)
+    )
+    job_events.publish(
+        job_id,
+        "agent_turn",
+        turn=turn_count,
+        text=text[:TURN_SUMMARY_MAX_CHARS],
+        tool_calls=[
+            block.name for block in message.content if isinstance(block, ToolUseBlock)
+        ],
+    )
 
 
 def _log_assistant_message(message: AssistantMessage, turn_count: int) -> None:
@@ -241,11 +588,27 @@ def _validate_output(output_path: Path) -> None:
         )
 
 
-def copy_output_to_final(output_path: Path, job_id: str) -> Path:
-    """Copy the job output video into the final output directory."""
+async def _package_hls(output_path: Path, job_id: str) -> Path | None:
+    """Encode the HLS ladder under its own deadline, skipping it on timeout.
+
+    The MP4 is already published, so HLS is best effort: a slow ladder is
+    dropped rather than failing the job.
+    """
+    try:
+        async with _deadline("package_hls", settings.hls_timeout):
+            return await package_hls(output_path, job_id)
+    except StageTimeoutError:
+        get_logfire().warn("hls_packaging_skipped", job_id=job_id)
+        return None
+
+
+async def _faststart_output(output_path: Path) -> Path:
+    """Remux the render with faststart, falling back to the raw render."""
     logfire = get_logfire()
-    final_dir = settings.output_dir
-    final_dir.mkdir(parents=True, exist_ok=True)
-    final_path = final_dir / f"{job_id}.mp4"
-    shutil.copy2(output_path, final_path)
-    return final_path
+    faststart_path = output_path.with_name(f"{output_path.stem}.faststart.mp4")
+    with logfire.span("faststart_remux"):
+        if await remux_faststart(output_path, faststart_path):
+            return faststart_path
+    logfire.warn("faststart_remux_failed", output_path=str(output_path))
+    faststart_path.unlink(missing_ok=True)
+    return output_path
@@ -0,0 +1,193 @@
+"""Post-render packaging: faststart MP4 remux and an HLS rendition ladder."""
+
+from __future__ import annotations
+
+import asyncio
+import shutil
+from pathlib import Path
+from typing import NamedTuple
+
+from app.agent.media_processing import probe_media, run_ffmpeg
+from app.agent.observability import get_logfire
+from app.config import settings
+
+HLS_DIR_NAME = "hls"
+HLS_MASTER_PLAYLIST = "master.m3u8"
+HLS_SEGMENT_SECONDS = 4
+AAC_LC_CODEC = "mp4a.40.2"
+
+
+class Rendition(NamedTuple):
+    """One rung of the HLS bitrate ladder."""
+
+    height: int
+    video_bitrate_kbps: int
+    audio_bitrate_kbps: int
+
+
+_LADDER: dict[int, Rendition] = {
+    1080: Rendition(1080, 5000, 192),
+    720: Rendition(720, 2800, 128),
+    480: Rendition(480, 1400, 96),
+    360: Rendition(360, 800, 96),
+}
+
+
+def _rendition_for(height: int) -> Rendition:
+    """Return the ladder rung for *height*, scaling bitrate for unknown heights."""
+    if height in _LADDER:
+        return _LADDER[height]
+    return Rendition(height, max(400, round(5000 * (height / 1080) ** 2)), 128)
+
+
+def _h264_level(height: int) -> int:
+    """Return the H.264 level (times ten) covering *height* at up to 60 fps."""
+    if height <= 720:
+        return 32
+    if height <= 1080:
+        return 42
+    return 52
+
+
+def _scaled_width(height: int, source_width: int, source_height: int) -> int:
+    """Width ffmpeg's ``scale=-2:<height>`` picks for a source of this size."""
+    return round(source_width * height / (source_height * 2)) * 2
+
+
+def hls_dir(job_id: str) -> Path:
+    """Return the directory holding a job's HLS renditions."""
+    return settings.output_dir / HLS_DIR_NAME / job_id
+
+
+async def remux_faststart(src: Path, dest: Path) -> bool:
+    """Copy *src* to *dest* with the moov atom moved to the front."""
+    return await run_ffmpeg([
+        "-i",
+        str(src),
+        "-map",
+        "0",
+        "-c",
+        "copy",
+        "-movflags",
+        "+faststart",
+        str(dest),
+    ])
+
+
+async def _encode_rendition(src: Path, out_dir: Path, rendition: Rendition) -> bool:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    video_kbps = rendition.video_bitrate_kbps
+    return await run_ffmpeg([
+        "-i",
+        str(src),
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a:0?",
+        "-vf",
+        f"scale=-2:{rendition.height}",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-profile:v",
+        "high",
+        "-level:v",
+        f"{_h264_level(rendition.height) / 10:g}",
+        "-b:v",
+        f"{video_kbps}k",
+        "-maxrate",
+        f"{round(video_kbps * 1.07)}k",
+        "-bufsize",
+        f"{video_kbps * 2}k",
+        "-force_key_frames",
+        f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+        "-c:a",
+        "aac",
+        "-b:a",
+        f"{rendition.audio_bitrate_kbps}k",
+        "-f",
+        "hls",
+        "-hls_time",
+        str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type",
+        "vod",
+        "-hls_segment_filename",
+        str(out_dir / "segment_%04d.ts"),
+        str(out_dir / "index.m3u8"),
+    ])
+
+
+def _master_playlist(
+    renditions: list[Rendition],
+    source_width: int,
+    source_height: int,
+    has_audio: bool,
+) -> str:
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for rendition in renditions:
+        bandwidth = (rendition.video_bitrate_kbps + rendition.audio_bitrate_kbps) * 1000
+        width = _scaled_width(rendition.height, source_width, source_height)
+        codecs = f"avc1.6400{_h264_level(rendition.height):02x}"
+        if has_audio:
+            codecs = f"{codecs},{AAC_LC_CODEC}"
+        lines.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},"
+            f"RESOLUTION={width}x{rendition.height},"
+            f"CODECS=\"{codecs}\",NAME=\"{rendition.height}p\""
+        )
+        lines.append(f"{rendition.height}p/index.m3u8")
+    return "\n".join(lines) + "\n"
+
+
+async def package_hls(src: Path, job_id: str) -> Path | None:
+    """Encode the HLS ladder for *src* in parallel. Returns the master playlist.
+
+    Rungs taller than *src* are clamped to its height and duplicates dropped,
+    so a 720p render gets one 720p rendition rather than one per taller rung.
+    Renditions are written to a staging directory and renamed into place only
+    once every rung succeeded, so clients never see a partial ladder.
+    """
+    logfire = get_logfire()
+    if not settings.hls_renditions:
+        return None
+    probe = await probe_media(src)
+    if not probe or not probe.get("width") or not probe.get("height"):
+        logfire.error("hls_probe_failed", job_id=job_id, path=str(src))
+        return None
+    source_width, source_height = probe["width"], probe["height"]
+    renditions = sorted(
+        {
+            _rendition_for(min(height, source_height))
+            for height in settings.hls_renditions
+        },
+        key=lambda r: r.height,
+        reverse=True,
+    )
+
+    final_dir = hls_dir(job_id)
+    staging_dir = final_dir.with_name(f".{job_id}.tmp")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    with logfire.span("package_hls", job_id=job_id, renditions=len(renditions)):
+        try:
+            results = await asyncio.gather(*(
+                _encode_rendition(src, staging_dir / f"{r.height}p", r)
+                for r in renditions
+            ))
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        if not all(results):
+            logfire.error("hls_packaging_failed", job_id=job_id)
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return None
+
+        (staging_dir / HLS_MASTER_PLAYLIST).write_text(
+            _master_playlist(
+                renditions, source_width, source_height, bool(probe["has_audio"])
+            )
+        )
+        shutil.rmtree(final_dir, ignore_errors=True)
+        staging_dir.rename(final_dir)
+        return final_dir / HLS_MASTER_PLAYLIST
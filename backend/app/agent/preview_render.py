@@ -0,0 +1,181 @@
+"""Quick low-resolution still previews for the agent's self-check loop.
+
+The requested frames are rendered concurrently with ``remotion still`` at a
+reduced ``--scale``, so the agent can look at a handful of frames in seconds
+instead of paying for a full 1920x1080 render every time it wants to check
+its work. The job's project is bundled on the first preview and the bundle is
+reused until a file under ``src/`` changes; the preview directory is removed
+when the agent finishes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+from app.agent.bundle_cache import bundle_env
+from app.agent.chunked_render import bundle_project
+from app.agent.observability import get_logfire
+from app.agent.subprocesses import run_command
+from app.config import settings
+
+PREVIEW_DIR_NAME = ".preview"
+BUNDLE_KEY_NAME = "bundle.key"
+# Project files outside src/ that change what the bundle contains.
+_BUNDLE_INPUTS = ("remotion.config.js", "package.json")
+
+
+def select_frames(
+    *,
+    frames: list[int] | None = None,
+    timestamps: list[float] | None = None,
+    every_nth_frame: int | None = None,
+    duration_in_frames: int | None = None,
+    fps: float | None = None,
+) -> list[int]:
+    """Resolve the frame numbers a preview request asks for.
+
+    Explicit *frames* and *timestamps* (seconds, converted with *fps*) are
+    combined; *every_nth_frame* samples ``[0, duration_in_frames)``. The result
+    is de-duplicated, sorted, clamped to the composition and capped at
+    ``settings.preview_max_frames`` evenly spread picks.
+    """
+    fps = fps or settings.default_fps
+    selected = set(frames or [])
+    selected.update(round(seconds * fps) for seconds in timestamps or [])
+    if every_nth_frame and duration_in_frames:
+        selected.update(range(0, duration_in_frames, max(1, every_nth_frame)))
+
+    last_frame = duration_in_frames - 1 if duration_in_frames else None
+    ordered = sorted(
+        {
+            max(0, frame if last_frame is None else min(frame, last_frame))
+            for frame in selected
+        }
+    )
+    limit = max(1, settings.preview_max_frames)
+    if len(ordered) <= limit:
+        return ordered
+    step = (len(ordered) - 1) / (limit - 1) if limit > 1 else 0
+    return sorted({ordered[round(index * step)] for index in range(limit)})
+
+
+def preview_dir(job_dir: Path) -> Path:
+    """Return the directory holding *job_dir*'s preview bundle and stills."""
+    return job_dir / "output" / PREVIEW_DIR_NAME
+
+
+def _source_fingerprint(job_dir: Path) -> str:
+    """Hash the path, size and mtime of every file the bundle is built from."""
+    paths = [job_dir / name for name in _BUNDLE_INPUTS]
+    for root, dirs, files in os.walk(job_dir / "src"):
+        dirs.sort()
+        paths.extend(Path(root) / name for name in sorted(files))
+
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        rel = path.relative_to(job_dir).as_posix()
+        digest.update(f"{rel}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _prepare_preview_dir(directory: Path, key: str) -> bool:
+    """Empty the stills directory and check the bundle against *key*.
+
+    Returns True if the existing bundle was built from sources matching
+    *key*; otherwise removes it so it can be rebuilt. Blocking.
+    """
+    frames_dir = directory / "frames"
+    shutil.rmtree(frames_dir, ignore_errors=True)
+    frames_dir.mkdir(parents=True)
+    key_path = directory / BUNDLE_KEY_NAME
+    try:
+        if key_path.read_text() == key:
+            return True
+    except FileNotFoundError:
+        pass
+    key_path.unlink(missing_ok=True)
+    shutil.rmtree(directory / "bundle", ignore_errors=True)
+    return False
+
+
+async def discard_previews(job_dir: Path) -> None:
+    """Delete *job_dir*'s preview bundle and stills."""
+    await asyncio.to_thread(shutil.rmtree, preview_dir(job_dir), ignore_errors=True)
+
+
+async def render_previews(
+    job_dir: Path,
+    composition_id: str,
+    frames: list[int],
+    scale: float | None = None,
+) -> tuple[list[tuple[int, Path]], list[str]]:
+    """Render *frames* of *composition_id* as scaled-down JPEG stills.
+
+    Returns the ``(frame, path)`` pairs that rendered and an error message for
+    each that did not. Raises RenderError if the project fails to bundle.
+    Stills from the previous call are deleted.
+    """
+    logfire = get_logfire()
+    scale = min(1.0, max(0.05, scale or settings.preview_scale))
+    directory = preview_dir(job_dir)
+    bundle_dir = directory / "bundle"
+    frames_dir = directory / "frames"
+
+    with logfire.span(
+        "preview_render",
+        composition_id=composition_id,
+        frames=frames,
+        scale=scale,
+    ):
+        key = await asyncio.to_thread(_source_fingerprint, job_dir)
+        reused = await asyncio.to_thread(_prepare_preview_dir, directory, key)
+        if not reused:
+            await bundle_project(job_dir, bundle_dir)
+            await asyncio.to_thread((directory / BUNDLE_KEY_NAME).write_text, key)
+
+        semaphore = asyncio.Semaphore(max(1, settings.preview_concurrency))
+
+        async def render_still(frame: int) -> tuple[int, Path, str | None]:
+            still_path = frames_dir / f"frame-{frame:06d}.jpg"
+            async with semaphore:
+                result = await run_command(
+                    [
+                        "npx",
+                        "remotion",
+                        "still",
+                        str(bundle_dir),
+                        composition_id,
+                        str(still_path),
+                        f"--frame={frame}",
+                        f"--scale={scale}",
+                        "--image-format=jpeg",
+                    ],
+                    cwd=job_dir,
+                    env=bundle_env(),
+                )
+            if result.ok and still_path.exists():
+                return frame, still_path, None
+            return frame, still_path, (
+                f"frame {frame}: remotion still failed "
+                f"(exit {result.returncode}):\n{result.output_tail}"
+            )
+
+        outcomes = await asyncio.gather(*(render_still(f) for f in frames))
+
+    rendered = [(frame, path) for frame, path, error in outcomes if error is None]
+    errors = [error for _, _, error in outcomes if error is not None]
+    logfire.info(
+        "preview_render_complete",
+        rendered=len(rendered),
+        failed=len(errors),
+        bundle_reused=reused,
+    )
+    return rendered, errors
@@ -0,0 +1,183 @@
+"""Two-tier cache for enhanced prompts.
+
+Entries are keyed on everything that determines the enhancer's output: the
+whitespace-normalised user prompt, the video style, a hash of the asset
+context, the Fireworks model and a hash of the system prompt. A bounded
+in-memory LRU sits in front of a JSON-file tier on disk whose entries expire
+after a TTL. The retention sweep calls :meth:`PromptCache.prune` to delete
+expired disk entries and cap how many are kept.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from app.agent import metrics
+from app.agent.observability import get_logfire
+from app.agent.video_styles import VideoStyle
+from app.config import settings
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse runs of whitespace so trivially different prompts share a key."""
+    return " ".join(prompt.split())
+
+
+def make_key(
+    prompt: str,
+    style: VideoStyle,
+    assets_context: str,
+    model: str,
+    system_prompt: str,
+) -> str:
+    """Return the cache key for one enhancement request."""
+    payload = json.dumps(
+        {
+            "prompt": normalize_prompt(prompt),
+            "style": style.value,
+            "assets": _sha256(assets_context),
+            "model": model,
+            "system_prompt": _sha256(system_prompt),
+        },
+        sort_keys=True,
+    )
+    return _sha256(payload)
+
+
+class PromptCache:
+    """In-memory LRU backed by a TTL-bounded on-disk store."""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_entries: int,
+        ttl_seconds: int,
+        max_disk_entries: int,
+    ) -> None:
+        self._directory = directory
+        self._max_entries = max(1, max_entries)
+        self._ttl_seconds = ttl_seconds
+        self._max_disk_entries = max(1, max_disk_entries)
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def get(self, key: str) -> str | None:
+        """Return the cached value for *key*, or None on a miss."""
+        logfire = get_logfire()
+        now = time.time()
+
+        cached = self._memory.get(key)
+        if cached is not None and now - cached[0] < self._ttl_seconds:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            logfire.info("prompt_cache_hit", tier="memory")
+            return cached[1]
+        self._memory.pop(key, None)
+
+        entry = self._read_disk(key)
+        if entry is not None and now - entry[0] < self._ttl_seconds:
+            self._remember(key, *entry)
+            self.stats["disk_hits"] += 1
+            logfire.info("prompt_cache_hit", tier="disk")
+            return entry[1]
+        if entry is not None:
+            self._path(key).unlink(missing_ok=True)
+
+        self.stats["misses"] += 1
+        logfire.info("prompt_cache_miss")
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        """Store *value* under *key* in both tiers.
+
+        The memory tier is updated first, so the entry is still served by
+        this process if the disk write raises OSError.
+        """
+        created_at = time.time()
+        self._remember(key, created_at, value)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        try:
+            tmp_path.write_text(
+                json.dumps({"created_at": created_at, "value": value})
+            )
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def prune(self) -> int:
+        """Delete expired disk entries, then the oldest beyond the disk limit.
+
+        An entry's age is its file's mtime, which :meth:`put` leaves at the
+        creation time, so nothing has to be parsed. Temp files left by an
+        interrupted write are deleted once they are as old as an expired
+        entry. Returns the number of files deleted.
+        """
+        cutoff = time.time() - self._ttl_seconds
+        kept: list[tuple[float, Path]] = []
+        deleted = 0
+        try:
+            entries = list(os.scandir(self._directory))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+            except FileNotFoundError:
+                continue
+            if mtime < cutoff:
+                Path(entry.path).unlink(missing_ok=True)
+                deleted += 1
+            elif not entry.name.startswith(".") and entry.name.endswith(".json"):
+                kept.append((mtime, Path(entry.path)))
+
+        excess = len(kept) - self._max_disk_entries
+        if excess > 0:
+            kept.sort()
+            for _mtime, path in kept[:excess]:
+                path.unlink(missing_ok=True)
+                deleted += 1
+        return deleted
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self._directory / f"{key}.json"
+
+    def _read_disk(self, key: str) -> tuple[float, str] | None:
+        try:
+            data = json.loads(self._path(key).read_text())
+            return float(data["created_at"]), str(data["value"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+prompt_cache = PromptCache(
+    settings.prompt_cache_dir,
+    max_entries=settings.prompt_cache_max_entries,
+    ttl_seconds=settings.prompt_cache_ttl_seconds,
+    max_disk_entries=settings.prompt_cache_max_disk_entries,
+)
+
+metrics.register_callback(
+    "renderwood_prompt_cache_lookups_total",
+    "Prompt enhancement cache lookups, by result.",
+    "counter",
+    "result",
+    lambda: dict(prompt_cache.stats),
+)
@@ -7,8 +7,12 @@ production brief tailored to that genre.
 
 from __future__ import annotations
 
-from app.agent.agent_factory import get_prompt_enhancer_agent
+from app.agent.agent_factory import (
+    compose_system_prompt,
+    get_prompt_enhancer_agent,
+)
 from app.agent.observability import get_logfire
+from app.agent.prompt_cache import make_key, prompt_cache
 from app.agent.video_styles import VideoStyle
 from app.config import settings
 
@@ -171,6 +175,7 @@ async def enhance_prompt(
     user_prompt: str,
     style: VideoStyle = VideoStyle.GENERAL,
     assets_context: str = "",
+    use_cache: bool = True,
 ) -> str:
     """Expand user prompt into a detailed, style-aware production brief.
 
@@ -178,6 +183,7 @@ async def enhance_prompt(
         user_prompt: Raw user prompt text.
         style: Video style to apply (default: GENERAL).
         assets_context: Optional asset descriptions to include in the brief.
+        use_cache: Serve and store results in the prompt cache (default: True).
     """
     logfire = get_logfire()
 
@@ -186,6 +192,18 @@ async def enhance_prompt(
         return user_prompt
 
     with logfire.span("prompt_enhancement", video_style=style.value):
+        cache_key = make_key(
+            user_prompt,
+            style,
+            assets_context,
+            settings.fireworks_model,
+            compose_system_prompt(style, _BASE_SYSTEM_PROMPT),
+        )
+        if use_cache:
+            cached = prompt_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         try:
             agent = get_prompt_enhancer_agent(style, _BASE_SYSTEM_PROMPT)
             prompt_input = (
@@ -195,15 +213,6 @@ async def enhance_prompt(
             )
             result = await agent.run(prompt_input)
             enhanced = result.output.strip()
-
-            logfire.info(
-                "prompt_enhanced",
-                original_prompt=user_prompt,
-                enhanced_prompt=enhanced,
-                style=style.value,
-            )
-            return enhanced
-
         except Exception as exc:
             logfire.error(
                 "prompt_enhancement_failed",
@@ -212,3 +221,24 @@ async def enhance_prompt(
                 user_prompt=user_prompt,
             )
             return user_prompt
+
+        if not enhanced:
+            logfire.warn("prompt_enhancement_empty", user_prompt=user_prompt)
+            return user_prompt
+
+        logfire.info(
+            "prompt_enhanced",
+            original_prompt=user_prompt,
+            enhanced_prompt=enhanced,
+            style=style.value,
+        )
+        # A failed cache write must not throw away a brief we already paid for.
+        try:
+            prompt_cache.put(cache_key, enhanced)
+        except OSError as exc:
+            logfire.warn(
+                "prompt_cache_put_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
+        return enhanced
@@ -0,0 +1,76 @@
+"""Atomic, zero-copy publishing of finished videos into ``settings.output_dir``.
+
+A render is published by hardlinking it beside its final name and renaming it
+into place, so ``download_video`` never sees a partially written file and the
+bytes are not copied when the job workspace and ``output_dir`` share a
+filesystem. A JSON manifest next to the video records its hash, size and
+duration for cache validation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+from app.agent.file_links import publish_file
+from app.agent.media_processing import probe_duration
+from app.agent.observability import get_logfire
+from app.agent.upload_store import hash_file
+from app.config import settings
+
+
+def final_video_path(job_id: str) -> Path:
+    """Return where the published video for *job_id* lives."""
+    return settings.output_dir / f"{job_id}.mp4"
+
+
+def manifest_path(job_id: str) -> Path:
+    """Return the path of the manifest describing *job_id*'s published video."""
+    return settings.output_dir / f"{job_id}.json"
+
+
+async def publish_output(src: Path, job_id: str) -> Path:
+    """Publish the render at *src* as *job_id*'s final video and manifest."""
+    logfire = get_logfire()
+    final_path = final_video_path(job_id)
+    with logfire.span("publish_output", job_id=job_id):
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(publish_file, src, final_path)
+
+        digest = await asyncio.to_thread(hash_file, final_path)
+        manifest = {
+            "sha256": digest,
+            "size_bytes": final_path.stat().st_size,
+            "duration_seconds": await probe_duration(final_path),
+            "published_at": time.time(),
+        }
+        _write_manifest(job_id, manifest)
+        logfire.info("output_published", job_id=job_id, **manifest)
+    return final_path
+
+
+def publish_clone(source_job_id: str, job_id: str) -> Path:
+    """Publish *source_job_id*'s video and manifest under *job_id*, by link."""
+    dest = final_video_path(job_id)
+    publish_file(final_video_path(source_job_id), dest)
+    if manifest_path(source_job_id).exists():
+        publish_file(manifest_path(source_job_id), manifest_path(job_id))
+    return dest
+
+
+def read_manifest(job_id: str) -> dict | None:
+    """Return *job_id*'s manifest, or None if it has none."""
+    try:
+        return json.loads(manifest_path(job_id).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_manifest(job_id: str, manifest: dict) -> None:
+    path = manifest_path(job_id)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, path)
@@ -0,0 +1,89 @@
+"""Parse Remotion CLI output into frame-level render progress with an ETA."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+# Matches Remotion progress lines such as "Rendered 120/900" or
+# "Rendering frames ━━━━━━ 120/900".
+_PROGRESS_RE = re.compile(r"Render(?:ed|ing frames)\D*?(\d+)\s*/\s*(\d+)")
+_EMIT_INTERVAL_SECONDS = 0.5
+RENDER_LOG_NAME = "render.log"
+
+
+class RenderProgressTracker:
+    """Aggregates progress from one or more render processes.
+
+    Each process is a *source* (for example one chunk of a chunked render).
+    The tracker sums frames across sources and emits
+    ``{"frames_rendered", "total_frames", "eta_seconds"}`` at most every
+    half second, plus once when all frames are done.
+    """
+
+    def __init__(self, emit: Callable[[dict[str, Any]], None]) -> None:
+        self._emit = emit
+        self._sources: dict[str, tuple[int, int]] = {}
+        self._started_at: float | None = None
+        self._last_emit = 0.0
+
+    def feed(self, source: str, line: str) -> None:
+        """Consume one line of render output from *source*."""
+        match = _PROGRESS_RE.search(line)
+        if match is None:
+            return
+        done, total = int(match.group(1)), int(match.group(2))
+        if total <= 0:
+            return
+
+        now = time.monotonic()
+        if self._started_at is None:
+            self._started_at = now
+        self._sources[source] = (min(done, total), total)
+
+        frames_rendered = sum(d for d, _ in self._sources.values())
+        total_frames = sum(t for _, t in self._sources.values())
+        finished = frames_rendered >= total_frames
+        if not finished and now - self._last_emit < _EMIT_INTERVAL_SECONDS:
+            return
+        self._last_emit = now
+
+        elapsed = now - self._started_at
+        eta = None
+        if frames_rendered and elapsed > 0:
+            eta = round(elapsed / frames_rendered * (total_frames - frames_rendered), 1)
+        self._emit({
+            "frames_rendered": frames_rendered,
+            "total_frames": total_frames,
+            "eta_seconds": eta,
+        })
+
+
+async def follow_render_log(
+    log_path: Path, tracker: RenderProgressTracker, poll_seconds: float = 0.5
+) -> None:
+    """Tail *log_path* (written by the agent's render command) into *tracker*.
+
+    Runs until cancelled; the file may not exist yet when it starts.
+    """
+    offset = 0
+    pending = b""
+    while True:
+        try:
+            with log_path.open("rb") as fh:
+                if log_path.stat().st_size < offset:
+                    offset, pending = 0, b""  # log was truncated by a re-render
+                fh.seek(offset)
+                data = fh.read()
+        except FileNotFoundError:
+            data = b""
+        if data:
+            offset += len(data)
+            *lines, pending = (pending + data).replace(b"\r", b"\n").split(b"\n")
+            for raw in lines:
+                tracker.feed("log", raw.decode(errors="replace"))
+        await asyncio.sleep(poll_seconds)
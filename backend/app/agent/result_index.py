@@ -0,0 +1,151 @@
+"""Index of finished renders keyed on everything that determines the output.
+
+Two requests with the same normalised prompt, style, uploaded assets,
+generation settings and Remotion template produce interchangeable videos, so
+a repeat can reuse the earlier render instead of paying for another agent
+run. A request is matched on the assets it would see when submitted; a
+finished render is recorded under the assets the job actually linked.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.agent.packaging import HLS_MASTER_PLAYLIST, hls_dir
+from app.agent.prompt_cache import normalize_prompt
+from app.agent.publishing import final_video_path, publish_clone
+from app.agent.upload_assets import LinkedAsset
+from app.agent.video_styles import VideoStyle
+from app.agent.workspaces import template_fingerprint
+from app.config import settings
+
+INDEX_FILE_NAME = ".result_index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    path = settings.output_dir / INDEX_FILE_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        conn.execute(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _generation_settings() -> dict[str, object]:
+    """Settings that change what the agent renders from the same request."""
+    return {
+        "claude_model": settings.claude_model,
+        "fireworks_model": settings.fireworks_model,
+        "render_mode": settings.render_mode,
+        "fps": settings.default_fps,
+        "width": settings.default_width,
+        "height": settings.default_height,
+        "proxy": [
+            settings.proxy_max_width,
+            settings.proxy_max_height,
+            settings.proxy_keyframe_interval_seconds,
+            settings.proxy_crf,
+        ],
+    }
+
+
+def request_key(
+    prompt: str, style: VideoStyle, assets: list[LinkedAsset]
+) -> str | None:
+    """Return the dedup key for a request, or None if it cannot be keyed.
+
+    *assets* is every upload the job links (see
+    ``upload_assets.asset_snapshot``), with its description and whether its
+    proxy stands in for it. Uploads stored before content hashing existed
+    have no sha256; requests made while any such upload exists are never
+    deduplicated. Blocking: hashes the template on first use.
+    """
+    if any(not asset.sha256 for asset in assets):
+        return None
+
+    payload = json.dumps(
+        {
+            "prompt": normalize_prompt(prompt),
+            "style": style.value,
+            "assets": [list(asset) for asset in assets],
+            "settings": _generation_settings(),
+            "template": template_fingerprint(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup(key: str) -> str | None:
+    """Return the job id of a finished render for *key* whose video still exists."""
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT job_id FROM results WHERE key = ?", (key,)
+        ).fetchone()
+    if row is None or not final_video_path(row[0]).exists():
+        return None
+    return row[0]
+
+
+def record(key: str, job_id: str) -> None:
+    """Remember that *job_id* produced the render for *key*."""
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, job_id, created_at) "
+            "VALUES (?, ?, ?)",
+            (key, job_id, time.time()),
+        )
+
+
+def clone_result(source_job_id: str, job_id: str) -> dict[str, str]:
+    """Publish *source_job_id*'s render under *job_id* without copying it.
+
+    The MP4 and its manifest are hardlinked and the HLS directory symlinked,
+    so the new job's download and streaming URLs work exactly like the
+    original's. Returns a result dict shaped like ``orchestrator.run``'s.
+    """
+    dest = publish_clone(source_job_id, job_id)
+    result = {
+        "output_path": str(dest),
+        "job_project_path": str(settings.remotion_jobs_path / source_job_id),
+    }
+
+    source_hls = hls_dir(source_job_id)
+    if (source_hls / HLS_MASTER_PLAYLIST).exists():
+        _link_hls(source_job_id, hls_dir(job_id))
+        result["hls_path"] = str(hls_dir(job_id) / HLS_MASTER_PLAYLIST)
+    return result
+
+
+def _link_hls(source_job_id: str, dest: Path) -> None:
+    """Point *dest* at *source_job_id*'s HLS directory, replacing what is there."""
+    if dest.is_dir() and not dest.is_symlink():
+        shutil.rmtree(dest)
+    tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+    os.symlink(source_job_id, tmp, target_is_directory=True)
+    try:
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,483 @@
+"""Disk-budget-aware retention of job workspaces and published outputs.
+
+Finished workspaces are compacted once they have been idle for
+``settings.workspace_compact_after_seconds`` or, least recently used first,
+while ``remotion_jobs`` plus ``final_vids`` exceed
+``settings.storage_budget_bytes``. Compaction keeps only what the agent
+produced: ``src/``, top-level files that differ from the template and any
+``public/`` files that are neither template files nor uploads. Uploads (or
+their render proxies) are recorded in a manifest by content hash, so
+:func:`restore_workspace` can rebuild the full project from the template and
+the upload object store.
+
+When compaction alone cannot meet the budget and
+``settings.retention_evict_outputs`` is set, the least recently used
+finished jobs are deleted outright, published video and HLS included.
+
+Each sweep also deletes stored upload objects that no upload name or job
+links to any more, along with their render proxies. Deleting an upload only
+frees its object at once if nothing else links it; objects still linked from
+job ``public/`` directories are freed here once those jobs are compacted or
+evicted. The sweep also prunes the prompt cache's disk tier.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import filecmp
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from typing import NamedTuple
+
+from app.agent import job_locks, upload_catalog
+from app.agent.file_links import link_or_copy
+from app.agent.observability import get_logfire
+from app.agent.packaging import hls_dir
+from app.agent.prompt_cache import prompt_cache
+from app.agent.publishing import final_video_path, manifest_path
+from app.agent.upload_proxies import existing_proxy, proxies_dir, release_proxy
+from app.agent.upload_store import (
+    digest_lock,
+    materialize,
+    object_path,
+    objects_dir,
+)
+from app.agent.workspaces import build_workspace, template_fingerprint
+from app.config import settings
+
+MANIFEST_NAME = "workspace_manifest.json"
+MANIFEST_VERSION = 1
+
+# Unreferenced objects younger than this are kept: an upload links its name
+# to the object just after storing it.
+OBJECT_GC_GRACE_SECONDS = 60 * 60
+
+_RESTORING_PREFIX = ".restoring-"
+_DISCARDED_PREFIX = ".discarded-"
+
+# Serialises compaction, restoration and eviction of any one workspace.
+_job_lock = threading.Lock()
+
+ActivePredicate = Callable[[str], bool]
+
+
+class RestoreResult(NamedTuple):
+    """Outcome of :func:`restore_workspace`."""
+
+    job_project_path: str
+    restored: bool
+    missing_assets: list[str]
+
+
+class SweepResult(NamedTuple):
+    """Counts reported by one retention sweep."""
+
+    compacted: int
+    evicted: int
+    usage_bytes: int
+    collected_objects: int
+    pruned_prompts: int
+
+
+def disk_usage(*roots: Path) -> int:
+    """Return the bytes allocated under *roots*, counting each inode once.
+
+    Symlinks are not followed, so shared ``node_modules`` and cloned HLS
+    directories are not double counted; hardlinked uploads and music count
+    once however many workspaces link them.
+    """
+    seen: set[tuple[int, int]] = set()
+    total = 0
+    stack = [root for root in roots if root.exists()]
+    while stack:
+        for entry in os.scandir(stack.pop()):
+            if entry.is_symlink():
+                continue
+            if entry.is_dir():
+                stack.append(Path(entry.path))
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            key = (stat.st_dev, stat.st_ino)
+            if key not in seen:
+                seen.add(key)
+                total += stat.st_blocks * 512
+    return total
+
+
+def is_compacted(job_dir: Path) -> bool:
+    """True if *job_dir* holds a compacted (not yet restored) workspace."""
+    return (job_dir / MANIFEST_NAME).exists() and not os.path.lexists(
+        job_dir / "node_modules"
+    )
+
+
+def _same_content(path: Path, reference: Path) -> bool:
+    try:
+        return path.samefile(reference) or filecmp.cmp(path, reference, shallow=False)
+    except OSError:
+        return False
+
+
+def _job_dirs() -> list[tuple[str, Path, float]]:
+    """Return ``(job_id, path, last_used)`` for every workspace, LRU first."""
+    root = settings.remotion_jobs_path
+    if not root.exists():
+        return []
+    jobs = [
+        (entry.name, Path(entry.path), entry.stat().st_mtime)
+        for entry in os.scandir(root)
+        if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False)
+    ]
+    return sorted(jobs, key=lambda job: job[2])
+
+
+def compact_workspace(job_dir: Path) -> bool:
+    """Shrink a finished workspace to its agent-authored files plus a manifest.
+
+    Returns False if *job_dir* is missing or already compacted. Safe to rerun
+    after an interrupted compaction: the manifest is written before anything
+    is removed and merged with on the next attempt.
+    """
+    with _job_lock:
+        if not job_dir.is_dir() or is_compacted(job_dir):
+            return False
+        return _compact_locked(job_dir)
+
+
+def _compact_locked(job_dir: Path) -> bool:
+    template = settings.remotion_project_path
+    last_used = job_dir.stat().st_mtime
+    manifest_path = job_dir / MANIFEST_NAME
+
+    assets: dict[str, str] = {}
+    proxied: set[str] = set()
+    if manifest_path.exists():
+        previous = json.loads(manifest_path.read_text())
+        assets = previous.get("assets", {})
+        proxied = set(previous.get("proxied", []))
+
+    # Uploads linked into public/ are recorded by hash and dropped; template
+    # files (the music library) are dropped; anything else is the agent's.
+    shared: list[Path] = []
+    public_dir = job_dir / "public"
+    for root, _dirs, files in os.walk(public_dir):
+        for name in files:
+            path = Path(root) / name
+            rel = path.relative_to(job_dir)
+            upload = (
+                upload_catalog.get(name) if path.parent == public_dir else None
+            )
+            digest = upload.metadata.get("sha256") if upload else None
+            proxy = existing_proxy(digest) if digest else None
+            if digest and _same_content(path, object_path(digest)):
+                assets[name] = digest
+                shared.append(path)
+            elif proxy and _same_content(path, proxy):
+                assets[name] = digest
+                proxied.add(name)
+                shared.append(path)
+            elif _same_content(path, template / rel):
+                shared.append(path)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "template": template_fingerprint(),
+        "compacted_at": time.time(),
+        "assets": assets,
+        "proxied": sorted(proxied),
+    }
+    tmp_path = manifest_path.with_name(f".{MANIFEST_NAME}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, manifest_path)
+
+    for path in shared:
+        path.unlink(missing_ok=True)
+    for root, dirs, _files in os.walk(public_dir, topdown=False):
+        for name in dirs:
+            try:
+                (Path(root) / name).rmdir()
+            except OSError:
+                pass  # still holds agent files
+
+    for entry in os.scandir(job_dir):
+        path = Path(entry.path)
+        if entry.name in {MANIFEST_NAME, "src", "public"}:
+            continue
+        if entry.is_symlink():
+            path.unlink()
+        elif entry.is_dir():
+            shutil.rmtree(path)
+        elif _same_content(path, template / entry.name):
+            path.unlink()
+
+    os.utime(job_dir, (last_used, last_used))
+    get_logfire().info(
+        "workspace_compacted", job_id=job_dir.name, assets=len(assets)
+    )
+    return True
+
+
+def restore_workspace(job_id: str) -> RestoreResult:
+    """Rebuild a compacted workspace from the template, uploads and its files.
+
+    The new workspace is assembled beside the compacted one and swapped in
+    by rename, so an interrupted restore never loses the compacted copy.
+    Uploads whose content is no longer in the object store are reported in
+    ``missing_assets``. Raises FileNotFoundError for an unknown job.
+    """
+    job_dir = settings.remotion_jobs_path / job_id
+    with _job_lock:
+        if not job_dir.is_dir():
+            raise FileNotFoundError(job_dir)
+        if not is_compacted(job_dir):
+            return RestoreResult(str(job_dir), False, [])
+        return _restore_locked(job_dir)
+
+
+def _restore_locked(job_dir: Path) -> RestoreResult:
+    logfire = get_logfire()
+    manifest = json.loads((job_dir / MANIFEST_NAME).read_text())
+    if manifest.get("template") != template_fingerprint():
+        logfire.warn("workspace_restore_template_changed", job_id=job_dir.name)
+
+    staging = job_dir.with_name(f"{_RESTORING_PREFIX}{job_dir.name}")
+    shutil.rmtree(staging, ignore_errors=True)
+    build_workspace(staging)
+    try:
+        for entry in os.scandir(job_dir):
+            if entry.name == MANIFEST_NAME:
+                continue
+            if entry.name == "src":
+                # The agent's sources replace the template's wholesale.
+                shutil.rmtree(staging / "src", ignore_errors=True)
+            _overlay(Path(entry.path), staging / entry.name)
+
+        missing = []
+        public_dir = staging / "public"
+        public_dir.mkdir(exist_ok=True)
+        proxied = set(manifest.get("proxied", []))
+        for name, digest in manifest.get("assets", {}).items():
+            # A proxy that has since been discarded falls back to its original
+            proxy = existing_proxy(digest) if name in proxied else None
+            source = proxy or object_path(digest)
+            if source.exists():
+                materialize(source, public_dir / name)
+            else:
+                missing.append(name)
+        (staging / "output").mkdir(exist_ok=True)
+
+        discarded = job_dir.with_name(f"{_DISCARDED_PREFIX}{uuid.uuid4().hex}")
+        os.rename(job_dir, discarded)
+        os.rename(staging, job_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    shutil.rmtree(discarded, ignore_errors=True)
+
+    logfire.info(
+        "workspace_restored", job_id=job_dir.name, missing_assets=len(missing)
+    )
+    return RestoreResult(str(job_dir), True, missing)
+
+
+def _overlay(src: Path, dest: Path) -> None:
+    """Link the compacted file or tree *src* over *dest* in the new workspace."""
+    if src.is_dir() and not src.is_symlink():
+        dest.mkdir(exist_ok=True)
+        for entry in os.scandir(src):
+            _overlay(Path(entry.path), dest / entry.name)
+        return
+    if dest.is_dir() and not dest.is_symlink():
+        shutil.rmtree(dest)
+    else:
+        dest.unlink(missing_ok=True)
+    link_or_copy(src, dest)
+
+
+def evict_job(job_id: str) -> None:
+    """Delete a finished job's workspace, published video, manifest and HLS."""
+    with _job_lock:
+        shutil.rmtree(settings.remotion_jobs_path / job_id, ignore_errors=True)
+        final_video_path(job_id).unlink(missing_ok=True)
+        manifest_path(job_id).unlink(missing_ok=True)
+        hls = hls_dir(job_id)
+        if hls.is_symlink():
+            hls.unlink()
+        else:
+            shutil.rmtree(hls, ignore_errors=True)
+    get_logfire().info("job_evicted", job_id=job_id)
+
+
+def _output_jobs() -> dict[str, float]:
+    """Return ``job_id -> mtime`` of published videos."""
+    root = settings.output_dir
+    if not root.exists():
+        return {}
+    return {
+        Path(entry.name).stem: entry.stat().st_mtime
+        for entry in os.scandir(root)
+        if entry.name.endswith(".mp4") and entry.is_file()
+    }
+
+
+def _stored_files(root: Path) -> list[Path]:
+    """Return the files in a ``<root>/<aa>/<digest>`` store, skipping temp files."""
+    if not root.exists():
+        return []
+    return [
+        Path(entry.path)
+        for shard in os.scandir(root)
+        if shard.is_dir(follow_symlinks=False) and not shard.name.startswith(".")
+        for entry in os.scandir(shard.path)
+        if entry.is_file(follow_symlinks=False) and not entry.name.startswith(".")
+    ]
+
+
+def collect_unreferenced_objects() -> int:
+    """Delete upload objects nothing links to, then their orphaned proxies.
+
+    An object is unreferenced when no catalogued upload records its hash and
+    its only link is the store's own. Returns the number of objects deleted.
+    """
+    referenced = {
+        entry.metadata.get("sha256") for entry in upload_catalog.entries()
+    }
+    cutoff = time.time() - OBJECT_GC_GRACE_SECONDS
+    collected = 0
+    for obj in _stored_files(objects_dir()):
+        if obj.name in referenced:
+            continue
+        with digest_lock(obj.name):
+            try:
+                stat = obj.stat()
+            except FileNotFoundError:
+                continue
+            if stat.st_nlink > 1 or stat.st_ctime > cutoff:
+                continue
+            obj.unlink(missing_ok=True)
+        collected += 1
+
+    for proxy in _stored_files(proxies_dir()):
+        release_proxy(proxy.name)
+    return collected
+
+
+def _try_compact(job_dir: Path) -> bool:
+    """Compact *job_dir*, logging failures so one bad workspace is skipped."""
+    try:
+        return compact_workspace(job_dir)
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        get_logfire().error(
+            "workspace_compaction_failed",
+            job_id=job_dir.name,
+            error=str(exc),
+            error_type=type(exc).__name__,
+        )
+        return False
+
+
+def sweep(is_active: ActivePredicate) -> SweepResult:
+    """Apply the age and disk-budget policies once. Skips active jobs.
+
+    A job counts as active if *is_active* says so or if any server process
+    holds its :mod:`job_locks` lock.
+    """
+    logfire = get_logfire()
+
+    def active(job_id: str) -> bool:
+        return is_active(job_id) or job_locks.is_held(job_id)
+
+    roots = (settings.remotion_jobs_path, settings.output_dir)
+    age_limit = settings.workspace_compact_after_seconds
+    budget = settings.storage_budget_bytes
+    compacted = evicted = 0
+
+    with logfire.span("retention_sweep"):
+        collected = collect_unreferenced_objects()
+        pruned = prompt_cache.prune()
+        now = time.time()
+        jobs = [job for job in _job_dirs() if not active(job[0])]
+
+        if age_limit > 0:
+            for _job_id, path, last_used in jobs:
+                if now - last_used >= age_limit and _try_compact(path):
+                    compacted += 1
+
+        usage = disk_usage(*roots)
+        if budget > 0:
+            for _job_id, path, _last_used in jobs:
+                if usage <= budget:
+                    break
+                before = disk_usage(path)
+                if _try_compact(path):
+                    compacted += 1
+                    usage -= before - disk_usage(path)
+
+        if budget > 0 and usage > budget and settings.retention_evict_outputs:
+            last_used = _output_jobs()
+            for job_id, _path, mtime in jobs:
+                last_used[job_id] = max(mtime, last_used.get(job_id, 0.0))
+            for job_id in sorted(last_used, key=last_used.get):
+                if usage <= budget:
+                    break
+                if active(job_id):
+                    continue
+                evict_job(job_id)
+                evicted += 1
+                usage = disk_usage(*roots)
+
+        logfire.info(
+            "retention_sweep_complete",
+            compacted=compacted,
+            evicted=evicted,
+            collected_objects=collected,
+            pruned_prompts=pruned,
+            usage_bytes=usage,
+            budget_bytes=budget,
+        )
+    return SweepResult(compacted, evicted, usage, collected, pruned)
+
+
+class RetentionManager:
+    """Runs :func:`sweep` periodically in a background thread."""
+
+    def __init__(self, interval_seconds: float) -> None:
+        self._interval = max(1.0, interval_seconds)
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self, is_active: ActivePredicate) -> None:
+        """Start sweeping. Object collection runs even with both policies off."""
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(
+            self._loop(is_active), name="retention-sweep"
+        )
+
+    async def stop(self) -> None:
+        """Stop the sweep task."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self, is_active: ActivePredicate) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(sweep, is_active)
+            except Exception as exc:
+                # A bad manifest or catalog error must not end sweeping for good
+                get_logfire().error(
+                    "retention_sweep_failed",
+                    error=str(exc),
+                    error_type=type(exc).__name__,
+                )
+            await asyncio.sleep(self._interval)
+
+
+retention_manager = RetentionManager(settings.retention_sweep_interval_seconds)
@@ -0,0 +1,110 @@
+"""Async subprocess runner for the render and packaging pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+from collections import deque
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import NamedTuple
+
+OUTPUT_TAIL_LINES = 40
+
+
+class CommandResult(NamedTuple):
+    """Exit status and the last lines of combined stdout/stderr."""
+
+    returncode: int
+    output_tail: str
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+async def run_command(
+    args: list[str],
+    *,
+    cwd: Path | None = None,
+    env: Mapping[str, str] | None = None,
+    on_line: Callable[[str], None] | None = None,
+) -> CommandResult:
+    """Run *args* in its own process group and wait for it.
+
+    Output is read line by line (``\\r`` progress updates count as lines) and
+    passed to *on_line*. If the awaiting task is cancelled, the whole process
+    group is killed so no renderer or browser children are left behind.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        cwd=cwd,
+        env={**os.environ, **env} if env else None,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True,
+    )
+    assert process.stdout is not None
+    tail: deque[str] = deque(maxlen=OUTPUT_TAIL_LINES)
+
+    try:
+        buffer = b""
+        while chunk := await process.stdout.read(4096):
+            buffer += chunk
+            *lines, buffer = buffer.replace(b"\r", b"\n").split(b"\n")
+            for raw in lines:
+                line = raw.decode(errors="replace").strip()
+                if not line:
+                    continue
+                tail.append(line)
+                if on_line is not None:
+                    on_line(line)
+        returncode = await process.wait()
+    except BaseException:
+        kill_process_group(process.pid)
+        await process.wait()
+        raise
+
+    return CommandResult(returncode, "\n".join(tail))
+
+
+def kill_process_group(pid: int) -> None:
+    """SIGKILL the process group led by *pid*, ignoring already-dead groups."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def kill_processes_in(directory: Path) -> int:
+    """SIGKILL every process whose working directory is inside *directory*.
+
+    The agent's Bash tool starts renders (node, Chrome, ffmpeg) that are not
+    our children, so they are found through ``/proc/<pid>/cwd`` instead.
+    Returns the number of processes signalled; a no-op where ``/proc`` is
+    unavailable.
+    """
+    proc_root = Path("/proc")
+    if not proc_root.is_dir():
+        return 0
+
+    root = directory.resolve()
+    own_pid = os.getpid()
+    killed = 0
+    for entry in proc_root.iterdir():
+        if not entry.name.isdigit() or int(entry.name) == own_pid:
+            continue
+        try:
+            cwd = Path(os.readlink(entry / "cwd"))
+        except OSError:
+            continue
+        if cwd != root and not cwd.is_relative_to(root):
+            continue
+        try:
+            os.kill(int(entry.name), signal.SIGKILL)
+            killed += 1
+        except (ProcessLookupError, PermissionError):
+            pass
+    return killed
@@ -2,49 +2,66 @@
 
 from __future__ import annotations
 
-import json
-import shutil
 from pathlib import Path
+from typing import NamedTuple
 
+from app.agent import upload_catalog
+from app.agent.upload_proxies import existing_proxy
+from app.agent.upload_store import materialize
 from app.config import settings
 
 
-def _is_sidecar(path: Path) -> bool:
-    """Check if a path is a sidecar metadata file (e.g. 'photo.jpg.json')."""
-    return path.suffix == ".json" and (path.parent / path.stem).exists()
-
-
-def collect_asset_summaries() -> list[dict[str, str]]:
-    """Read all upload sidecar metadata and return a list of asset summaries."""
-    upload_dir = settings.upload_dir
-    if not upload_dir.exists():
-        return []
+def collect_asset_summaries(*, use_proxies: bool = True) -> list[dict[str, str]]:
+    """Return a summary of every catalogued upload for prompt building.
 
+    With *use_proxies*, an upload whose proxy is ready is described from the
+    proxy's probe, matching the file :func:`copy_uploads_to_job` links in.
+    """
     summaries: list[dict[str, str]] = []
-    for item in sorted(upload_dir.iterdir()):
-        if not item.is_file() or item.name.startswith(".") or _is_sidecar(item):
-            continue
-
-        meta_path = upload_dir / f"{item.name}.json"
-        description = ""
-        mime_type = "application/octet-stream"
-        if meta_path.exists():
-            try:
-                meta = json.loads(meta_path.read_text())
-                description = meta.get("description", "")
-                mime_type = meta.get("mime_type", mime_type)
-            except (json.JSONDecodeError, OSError):
-                pass
-
+    for entry in upload_catalog.entries():
+        meta = entry.metadata
+        probe = meta.get("probe")
+        if (
+            use_proxies
+            and meta.get("proxy_probe")
+            and existing_proxy(meta.get("sha256", ""))
+        ):
+            probe = meta["proxy_probe"]
         summaries.append({
-            "filename": item.name,
-            "description": description,
-            "mime_type": mime_type,
+            "filename": entry.name,
+            "description": meta.get("description", ""),
+            "mime_type": meta.get("mime_type", "application/octet-stream"),
+            "media_info": describe_probe(probe),
         })
 
     return summaries
 
 
+def describe_probe(probe: dict | None) -> str:
+    """Summarise probe data, e.g. ``12.5s, 1080x1920, 29.97 fps, h264, audio: aac``.
+
+    Returns an empty string for uploads that were never probed.
+    """
+    if not probe:
+        return ""
+
+    parts: list[str] = []
+    if probe.get("duration_seconds") is not None:
+        parts.append(f"{probe['duration_seconds']:g}s")
+    if probe.get("width") and probe.get("height"):
+        parts.append(f"{probe['width']}x{probe['height']}")
+    if probe.get("fps"):
+        parts.append(f"{probe['fps']:g} fps")
+    if probe.get("video_codec"):
+        parts.append(probe["video_codec"])
+    if probe.get("duration_seconds") is not None:
+        audio = probe.get("audio_codec") if probe.get("has_audio") else None
+        parts.append(f"audio: {audio}" if audio else "no audio")
+    if probe.get("rotation"):
+        parts.append(f"rotated {probe['rotation']} degrees")
+    return ", ".join(parts)
+
+
 def format_assets_context(summaries: list[dict[str, str]]) -> str:
     """Render asset summaries into a plain-text block for prompt injection."""
     if not summaries:
@@ -53,21 +70,62 @@ def format_assets_context(summaries: list[dict[str, str]]) -> str:
     lines = ["Available uploaded assets:"]
     for asset in summaries:
         desc = asset["description"] or "no description"
-        lines.append(f"- {asset['filename']} -- {desc} ({asset['mime_type']})")
+        details = asset["mime_type"]
+        if asset.get("media_info"):
+            details = f"{details}; {asset['media_info']}"
+        lines.append(f"- {asset['filename']} -- {desc} ({details})")
 
     return "\n".join(lines)
 
 
-def copy_uploads_to_job(job_dir: Path) -> None:
-    """Copy all uploaded files (excluding sidecars) into *job_dir*/public/."""
+class LinkedAsset(NamedTuple):
+    """One upload as a job sees it; part of the job's result-index key."""
+
+    name: str
+    sha256: str
+    description: str
+    proxied: bool
+
+
+def _plan_links(use_proxies: bool) -> list[tuple[LinkedAsset, Path]]:
+    """Return each catalogued upload with the file a job would link for it."""
     upload_dir = settings.upload_dir
-    if not upload_dir.exists():
-        return
+    plan = []
+    for entry in upload_catalog.entries():
+        digest = entry.metadata.get("sha256", "")
+        proxy = existing_proxy(digest) if use_proxies else None
+        asset = LinkedAsset(
+            entry.name,
+            digest,
+            entry.metadata.get("description", ""),
+            proxy is not None,
+        )
+        plan.append((asset, proxy or upload_dir / entry.name))
+    return plan
+
+
+def asset_snapshot(*, use_proxies: bool = True) -> list[LinkedAsset]:
+    """Describe the uploads :func:`copy_uploads_to_job` would link right now."""
+    return [asset for asset, _source in _plan_links(use_proxies)]
+
+
+def copy_uploads_to_job(
+    job_dir: Path, *, use_proxies: bool = True
+) -> list[LinkedAsset]:
+    """Link all uploaded files (excluding sidecars) into *job_dir*/public/.
+
+    Uploads share an inode with their content-addressed object, so each job
+    gets a hardlink (or reflink) rather than a fresh copy of the bytes. When
+    *use_proxies* is set, an upload whose render proxy is ready (a video
+    transcode or a scaled-down image) is linked in its place, under the
+    upload's filename. Returns what was linked.
+    """
+    plan = _plan_links(use_proxies)
+    if not plan:
+        return []
 
     public_dir = job_dir / "public"
     public_dir.mkdir(parents=True, exist_ok=True)
-
-    for item in sorted(upload_dir.iterdir()):
-        if not item.is_file() or item.name.startswith(".") or _is_sidecar(item):
-            continue
-        shutil.copy2(item, public_dir / item.name)
+    for asset, source in plan:
+        materialize(source, public_dir / asset.name)
+    return [asset for asset, _source in plan]
@@ -0,0 +1,192 @@
+"""SQLite catalog of uploads so listings never rescan the uploads directory.
+
+The JSON sidecars stay the source of truth. The catalog mirrors them: it is
+updated whenever a sidecar is written or an upload deleted, and reconciled
+against the directory by mtime at startup to pick up out-of-band changes.
+"""
+
+from __future__ import annotations
+
+import json
+import mimetypes
+import os
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+from app.agent.observability import get_logfire
+from app.config import settings
+
+CATALOG_FILE_NAME = ".catalog.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    meta_mtime_ns INTEGER NOT NULL,
+    metadata TEXT NOT NULL
+)
+"""
+
+_initialized: set[Path] = set()
+
+
+class CatalogEntry(NamedTuple):
+    """A single upload as recorded in the catalog."""
+
+    name: str
+    size: int
+    metadata: dict
+
+
+def catalog_path() -> Path:
+    """Return the path of the catalog database."""
+    return settings.upload_dir / CATALOG_FILE_NAME
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    path = catalog_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        if path not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            _initialized.add(path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _row_for(file_path: Path, metadata: dict) -> tuple[str, int, int, int, str]:
+    stat = file_path.stat()
+    meta_path = file_path.parent / f"{file_path.name}.json"
+    return (
+        file_path.name,
+        stat.st_size,
+        stat.st_mtime_ns,
+        _mtime_ns(meta_path),
+        json.dumps(metadata),
+    )
+
+
+def upsert(file_path: Path, metadata: dict) -> None:
+    """Record (or refresh) *file_path* and its sidecar metadata."""
+    row = _row_for(file_path, metadata)
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO uploads "
+            "(name, size, mtime_ns, meta_mtime_ns, metadata) "
+            "VALUES (?, ?, ?, ?, ?)",
+            row,
+        )
+
+
+def remove(name: str) -> None:
+    """Forget the upload called *name*."""
+    with _connect() as conn:
+        conn.execute("DELETE FROM uploads WHERE name = ?", (name,))
+
+
+def get(name: str) -> CatalogEntry | None:
+    """Return the catalog entry for *name*, or None."""
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT name, size, metadata FROM uploads WHERE name = ?", (name,)
+        ).fetchone()
+    if row is None:
+        return None
+    return CatalogEntry(row[0], row[1], json.loads(row[2]))
+
+
+def entries() -> list[CatalogEntry]:
+    """Return every catalogued upload, sorted by name."""
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT name, size, metadata FROM uploads ORDER BY name"
+        ).fetchall()
+    return [CatalogEntry(name, size, json.loads(meta)) for name, size, meta in rows]
+
+
+def _load_sidecar(file_path: Path) -> dict:
+    meta_path = file_path.parent / f"{file_path.name}.json"
+    try:
+        return json.loads(meta_path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError, OSError):
+        mime_type, _ = mimetypes.guess_type(file_path.name)
+        return {"mime_type": mime_type or "application/octet-stream"}
+
+
+def reconcile() -> None:
+    """Bring the catalog in line with the uploads directory.
+
+    Rows whose file or sidecar mtime changed are refreshed, new files are
+    added and rows for vanished files are dropped.
+    """
+    logfire = get_logfire()
+    upload_dir = settings.upload_dir
+    if not upload_dir.exists():
+        return
+
+    with logfire.span("upload_catalog_reconcile"):
+        scanned = {
+            entry.name: entry
+            for entry in os.scandir(upload_dir)
+            if not entry.name.startswith(".") and entry.is_file()
+        }
+        files = {
+            name: entry
+            for name, entry in scanned.items()
+            if not (name.endswith(".json") and name[: -len(".json")] in scanned)
+        }
+
+        with _connect() as conn:
+            known = {
+                name: (mtime_ns, meta_mtime_ns)
+                for name, mtime_ns, meta_mtime_ns in conn.execute(
+                    "SELECT name, mtime_ns, meta_mtime_ns FROM uploads"
+                )
+            }
+
+        stale = [name for name in known if name not in files]
+        changed = []
+        for name, entry in files.items():
+            sidecar = scanned.get(f"{name}.json")
+            current = (
+                entry.stat().st_mtime_ns,
+                sidecar.stat().st_mtime_ns if sidecar else 0,
+            )
+            if known.get(name) != current:
+                changed.append(Path(entry.path))
+
+        rows = [_row_for(path, _load_sidecar(path)) for path in changed]
+        with _connect() as conn:
+            conn.executemany(
+                "DELETE FROM uploads WHERE name = ?", [(name,) for name in stale]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO uploads "
+                "(name, size, mtime_ns, meta_mtime_ns, metadata) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+        logfire.info(
+            "upload_catalog_reconciled",
+            files=len(files),
+            refreshed=len(rows),
+            removed=len(stale),
+        )
@@ -0,0 +1,159 @@
+"""Render proxies for uploaded media, cached by content hash.
+
+A proxy is a render-friendly stand-in for an upload, stored under
+``<upload_dir>/.proxies/<aa>/<sha256>``. Jobs link it into ``public/`` under
+the upload's own filename, so compositions reference it unchanged.
+
+- Video: phone and camera footage is often 4K, variable frame rate and
+  long-GOP, which makes Remotion's frame-accurate seeking decode many frames
+  per rendered frame. Its proxy is H.264 no larger than ``proxy_max_width``
+  x ``proxy_max_height`` (the box is turned for portrait clips), constant
+  frame rate and a keyframe every ``proxy_keyframe_interval_seconds``.
+- Images: Chrome decodes the full bitmap on every frame that shows one, so
+  an image larger than the output (``default_width`` x ``default_height``)
+  gets a copy scaled down to fit it, in the same format.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from app.agent.media_processing import scale_image, transcode_proxy
+from app.agent.observability import get_logfire
+from app.agent.upload_store import object_path
+from app.config import settings
+
+PROXIES_DIR_NAME = ".proxies"
+
+# Encoder arguments for each image type that gets a same-format render copy.
+_IMAGE_CODEC_ARGS = {
+    "image/jpeg": ["-c:v", "mjpeg", "-q:v", "2"],
+    "image/png": ["-c:v", "png"],
+    "image/webp": ["-c:v", "libwebp", "-quality", "90"],
+}
+
+
+def proxies_dir() -> Path:
+    """Return the root directory of the proxy cache."""
+    return settings.upload_dir / PROXIES_DIR_NAME
+
+
+def proxy_path(digest: str) -> Path:
+    """Return the cache path of the proxy for content hash *digest*."""
+    return proxies_dir() / digest[:2] / digest
+
+
+def existing_proxy(digest: str) -> Path | None:
+    """Return the proxy for *digest* if one has been built."""
+    if not digest:
+        return None
+    path = proxy_path(digest)
+    return path if path.exists() else None
+
+
+def _proxy_box(probe: dict) -> tuple[int, int]:
+    """Return the bounding box for a proxy, turned to match the clip."""
+    long_side = max(settings.proxy_max_width, settings.proxy_max_height)
+    short_side = min(settings.proxy_max_width, settings.proxy_max_height)
+    if (probe.get("height") or 0) > (probe.get("width") or 0):
+        return short_side, long_side
+    return long_side, short_side
+
+
+async def _store_proxy(
+    digest: str, encode: Callable[[Path], Awaitable[bool]]
+) -> Path | None:
+    """Return the cached proxy for *digest*, running *encode* to build it.
+
+    *encode* writes to a temp name that is renamed into place, so jobs never
+    link a partial file.
+    """
+    dest = proxy_path(digest)
+    if dest.exists():
+        return dest
+
+    tmp = dest.with_name(f".{digest}.{uuid.uuid4().hex}.tmp")
+    try:
+        if not await encode(tmp):
+            return None
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return dest
+
+
+async def build_proxy(src: Path, digest: str, probe: dict | None) -> Path | None:
+    """Build (or reuse) the proxy for the video at *src* with hash *digest*.
+
+    Returns the proxy path, or None if proxies are disabled, *src* is not a
+    video with a duration, or the transcode failed.
+    """
+    if not settings.proxy_enabled or not digest:
+        return None
+    if not probe or not probe.get("video_codec") or not probe.get("duration_seconds"):
+        return None
+
+    fps = probe.get("fps") or settings.default_fps
+    width, height = _proxy_box(probe)
+    with get_logfire().span(
+        "build_proxy", source=src.name, sha256=digest, fps=fps
+    ):
+        return await _store_proxy(
+            digest,
+            lambda tmp: transcode_proxy(
+                src,
+                tmp,
+                max_width=width,
+                max_height=height,
+                fps=fps,
+                keyframe_interval=max(
+                    1, round(fps * settings.proxy_keyframe_interval_seconds)
+                ),
+                crf=settings.proxy_crf,
+            ),
+        )
+
+
+async def build_image_proxy(
+    src: Path, digest: str, mime_type: str, probe: dict | None
+) -> Path | None:
+    """Build (or reuse) a render-resolution copy of the image at *src*.
+
+    Returns None if image proxies are disabled, the format has no encoder in
+    ``_IMAGE_CODEC_ARGS`` (e.g. animated GIF), the image already fits the
+    output resolution, or scaling failed.
+    """
+    codec_args = _IMAGE_CODEC_ARGS.get(mime_type)
+    if not settings.image_proxy_enabled or not digest or codec_args is None:
+        return None
+    width = (probe or {}).get("width") or 0
+    height = (probe or {}).get("height") or 0
+    long_side = max(settings.default_width, settings.default_height)
+    short_side = min(settings.default_width, settings.default_height)
+    if max(width, height) <= long_side and min(width, height) <= short_side:
+        return None
+
+    with get_logfire().span(
+        "build_image_proxy", source=src.name, sha256=digest, width=width, height=height
+    ):
+        return await _store_proxy(
+            digest,
+            lambda tmp: scale_image(
+                src,
+                tmp,
+                max_width=settings.default_width,
+                max_height=settings.default_height,
+                codec_args=codec_args,
+            ),
+        )
+
+
+def release_proxy(digest: str) -> None:
+    """Delete the proxy for *digest* once its original has left the store."""
+    if not digest or object_path(digest).exists():
+        return
+    proxy_path(digest).unlink(missing_ok=True)
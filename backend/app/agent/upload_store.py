@@ -0,0 +1,198 @@
+"""Content-addressed storage for uploaded files.
+
+Each upload is stored once under ``<upload_dir>/.objects/<aa>/<sha256>`` and
+the human-facing name in ``upload_dir`` is a hardlink to that object. Job
+``public/`` directories link to the same inode, so a clip is kept on disk
+exactly once no matter how many names or jobs reference it. Objects are made
+read-only so an edit through one link cannot corrupt the others.
+
+Storing, reusing and deleting the object for one digest are serialised by
+:func:`digest_lock`, so a delete can never remove an object that an upload of
+the same content has just been handed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+
+from app.agent.file_links import link_or_copy
+from app.config import settings
+
+OBJECTS_DIR_NAME = ".objects"
+HASH_CHUNK_SIZE = 1024 * 1024
+MAX_NAME_ATTEMPTS = 10_000
+
+# An object stored or reused this recently is about to get a name linked to
+# it, so release_object leaves it for the retention sweep.
+RELEASE_GRACE_SECONDS = 60
+
+_DIGEST_LOCK_STRIPES = 64
+_digest_locks = [threading.Lock() for _ in range(_DIGEST_LOCK_STRIPES)]
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an incoming upload exceeds ``settings.max_upload_bytes``."""
+
+
+def objects_dir() -> Path:
+    """Return the root directory of the object store."""
+    return settings.upload_dir / OBJECTS_DIR_NAME
+
+
+def object_path(digest: str) -> Path:
+    """Return the store path for content hash *digest*."""
+    return objects_dir() / digest[:2] / digest
+
+
+def staging_path() -> Path:
+    """Return a fresh temp path on the same filesystem as the store."""
+    root = objects_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    return root / f".incoming-{uuid.uuid4().hex}"
+
+
+@contextmanager
+def digest_lock(digest: str) -> Iterator[None]:
+    """Hold the lock that serialises store and release of *digest*'s object."""
+    with _digest_locks[hash(digest) % _DIGEST_LOCK_STRIPES]:
+        yield
+
+
+def hash_file(path: Path) -> str:
+    """Return the hex SHA-256 of the file at *path*."""
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        while chunk := fh.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ObjectWriter:
+    """Stream one upload into the store, hashing the bytes as they are written.
+
+    Call :meth:`write` for each chunk, then :meth:`commit` to move the
+    staging file into the store, or :meth:`discard` to drop it. The methods
+    do blocking file I/O.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._staging = staging_path()
+        self._out: BinaryIO | None = self._staging.open("xb")
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        """Append *chunk*. Raises UploadTooLargeError past the size limit."""
+        assert self._out is not None
+        self.size += len(chunk)
+        if self.size > self._max_bytes:
+            raise UploadTooLargeError(
+                f"Upload exceeds the {self._max_bytes} byte limit"
+            )
+        self._digest.update(chunk)
+        self._out.write(chunk)
+
+    def commit(self) -> tuple[str, Path, int]:
+        """Store the written bytes and return ``(digest, object_path, size)``."""
+        assert self._out is not None
+        self._out.close()
+        self._out = None
+        hex_digest, obj = store_file(self._staging, self._digest.hexdigest())
+        return hex_digest, obj, self.size
+
+    def discard(self) -> None:
+        """Delete the staging file. Safe to call more than once."""
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+        self._staging.unlink(missing_ok=True)
+
+
+def reserve_name(directory: Path, name: str) -> Path:
+    """Atomically claim a free filename in *directory* based on *name*.
+
+    The first free candidate among ``name``, ``stem_1.ext``, ``stem_2.ext``...
+    is created empty with ``O_EXCL``, so concurrent uploads can never pick
+    the same name. The caller replaces the placeholder with the real file.
+    """
+    base = Path(name)
+    for counter in range(MAX_NAME_ATTEMPTS):
+        candidate = directory / (
+            name if counter == 0 else f"{base.stem}_{counter}{base.suffix}"
+        )
+        try:
+            fd = os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return candidate
+    raise FileExistsError(f"No free filename for {name} in {directory}")
+
+
+def store_file(src: Path, digest: str | None = None) -> tuple[str, Path]:
+    """Move *src* into the store and return ``(digest, object_path)``.
+
+    If an object with the same content already exists, *src* is discarded
+    and the existing object is reused.
+    """
+    digest = digest or hash_file(src)
+    obj = object_path(digest)
+    with digest_lock(digest):
+        if obj.exists():
+            src.unlink(missing_ok=True)
+            # Refresh the timestamps so the retention sweep's and
+            # release_object's grace periods cover the link the caller is
+            # about to make.
+            os.utime(obj)
+            return digest, obj
+
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(src, 0o444)
+        os.replace(src, obj)
+    return digest, obj
+
+
+def materialize(src: Path, dest: Path) -> None:
+    """Expose the stored file *src* at *dest* without duplicating its bytes.
+
+    The link is built under a temporary name and renamed over *dest*, so
+    readers never observe a missing or partially written file.
+    """
+    tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}")
+    link_or_copy(src, tmp)
+    try:
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def release_object(digest: str) -> None:
+    """Delete the object for *digest* if no upload name or job links to it.
+
+    Objects still linked from job workspaces, or stored in the last
+    RELEASE_GRACE_SECONDS by an upload that has yet to link its name, are
+    left for the retention sweep to collect once those links are gone.
+    """
+    if not digest:
+        return
+    obj = object_path(digest)
+    with digest_lock(digest):
+        try:
+            stat = obj.stat()
+            if (
+                stat.st_nlink <= 1
+                and stat.st_mtime < time.time() - RELEASE_GRACE_SECONDS
+            ):
+                obj.unlink()
+        except FileNotFoundError:
+            pass
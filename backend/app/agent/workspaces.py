@@ -0,0 +1,204 @@
+"""Job workspaces built from the Remotion template without a full copy.
+
+Read-only parts of the template are shared instead of copied: ``node_modules``
+is symlinked and the built-in music tracks are hardlinked. Everything else
+(``src/``, config files, the rest of ``public/``) is copied so the agent can
+edit it freely. A small pool of ready workspaces is kept topped up in the
+background so a job can claim one with a single rename. Each server process
+keeps its own pool under ``.pool/<pid>``, so processes never delete or claim
+each other's workspaces.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from app.agent.file_links import link_tree
+from app.agent.observability import get_logfire
+from app.config import settings
+
+# Template paths (relative, POSIX-style) shared by symlink.
+_SYMLINKED_PATHS = frozenset({"node_modules"})
+# Template paths whose files are hardlinked into each workspace.
+_HARDLINKED_PATHS = frozenset({"public/music"})
+_SHARED_PATHS = _SYMLINKED_PATHS | _HARDLINKED_PATHS
+
+_BUILDING_PREFIX = ".building-"
+
+
+@functools.cache
+def template_fingerprint() -> str:
+    """Return a content hash of the Remotion template, excluding node_modules.
+
+    ``package-lock.json`` stands in for the installed dependencies. The value
+    is computed once per process.
+    """
+    template = settings.remotion_project_path
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(template):
+        rel_root = Path(root).relative_to(template)
+        dirs[:] = sorted(
+            d for d in dirs if (rel_root / d).as_posix() not in _SYMLINKED_PATHS
+        )
+        for name in sorted(files):
+            rel = (rel_root / name).as_posix()
+            digest.update(rel.encode("utf-8") + b"\0")
+            digest.update((Path(root) / name).read_bytes())
+    return digest.hexdigest()
+
+
+def build_workspace(dest: Path, template: Path | None = None) -> None:
+    """Materialise a fresh job workspace from *template* at *dest*."""
+    template = template or settings.remotion_project_path
+    dest.mkdir(parents=True, exist_ok=False)
+    try:
+        _populate(template, dest, "")
+    except BaseException:
+        shutil.rmtree(dest, ignore_errors=True)
+        raise
+
+
+def _populate(src_dir: Path, dest_dir: Path, prefix: str) -> None:
+    for entry in os.scandir(src_dir):
+        rel = f"{prefix}{entry.name}"
+        src = Path(entry.path)
+        target = dest_dir / entry.name
+
+        if rel in _SYMLINKED_PATHS:
+            os.symlink(src.resolve(), target, target_is_directory=entry.is_dir())
+        elif rel in _HARDLINKED_PATHS:
+            link_tree(src, target)
+        elif entry.is_symlink():
+            os.symlink(os.readlink(src), target)
+        elif entry.is_dir():
+            if any(path.startswith(f"{rel}/") for path in _SHARED_PATHS):
+                target.mkdir()
+                _populate(src, target, f"{rel}/")
+            else:
+                shutil.copytree(src, target, symlinks=True)
+        else:
+            shutil.copy2(src, target)
+
+
+def _pid_alive(name: str) -> bool:
+    """True if *name* is the pid of a process that is still running."""
+    if not name.isdigit():
+        return False
+    try:
+        os.kill(int(name), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class WorkspacePool:
+    """Pre-built workspaces waiting in *root*/<pid>, claimed by atomic rename."""
+
+    def __init__(self, root: Path, size: int) -> None:
+        self._parent = root
+        self._root = root / str(os.getpid())
+        self._size = max(0, size)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._refill_task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """Discard stale workspaces and start topping up the pool."""
+        # Resolved here rather than at import, in case the server forked.
+        self._root = self._parent / str(os.getpid())
+        await asyncio.to_thread(self._discard_stale)
+        self._root.mkdir(parents=True, exist_ok=True)
+        if self._size == 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._wake.set()
+        self._refill_task = asyncio.create_task(
+            self._refill_loop(), name="workspace-pool-refill"
+        )
+
+    def _discard_stale(self) -> None:
+        """Remove this pid's leftover pool and the pools of exited processes.
+
+        Pools of other live processes are left alone, since they may be
+        building or handing out workspaces right now.
+        """
+        if not self._parent.exists():
+            return
+        for entry in self._parent.iterdir():
+            if entry == self._root or not _pid_alive(entry.name):
+                shutil.rmtree(entry, ignore_errors=True)
+
+    async def stop(self) -> None:
+        """Stop the background refill task and discard unclaimed workspaces."""
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            await asyncio.gather(self._refill_task, return_exceptions=True)
+            self._refill_task = None
+        await asyncio.to_thread(shutil.rmtree, self._root, ignore_errors=True)
+
+    def acquire(self, dest: Path) -> None:
+        """Move a ready workspace to *dest*, building one inline if none is ready."""
+        logfire = get_logfire()
+        for candidate in self._ready():
+            try:
+                os.rename(candidate, dest)
+            except FileNotFoundError:
+                continue  # claimed by another worker in the meantime
+            logfire.info("workspace_pool_hit", dest=str(dest))
+            self._request_refill()
+            return
+
+        logfire.info("workspace_pool_miss", dest=str(dest))
+        build_workspace(dest)
+        self._request_refill()
+
+    def _ready(self) -> list[Path]:
+        if not self._root.exists():
+            return []
+        return [
+            path
+            for path in self._root.iterdir()
+            if path.is_dir() and not path.name.startswith(_BUILDING_PREFIX)
+        ]
+
+    def _request_refill(self) -> None:
+        if self._loop is None or self._wake is None:
+            return
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _refill_loop(self) -> None:
+        assert self._wake is not None
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while len(self._ready()) < self._size:
+                try:
+                    await asyncio.to_thread(self._build_one)
+                except OSError as exc:
+                    get_logfire().error(
+                        "workspace_pool_refill_failed",
+                        error=str(exc),
+                        error_type=type(exc).__name__,
+                    )
+                    break
+
+    def _build_one(self) -> None:
+        name = uuid.uuid4().hex
+        staging = self._root / f"{_BUILDING_PREFIX}{name}"
+        build_workspace(staging)
+        os.rename(staging, self._root / name)
+
+
+workspace_pool = WorkspacePool(
+    settings.remotion_jobs_path / ".pool",
+    settings.workspace_pool_size,
+)
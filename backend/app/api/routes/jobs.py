@@ -0,0 +1,111 @@
+"""Job status routes for queued video generation jobs."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from dataclasses import asdict
+from pathlib import Path
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.agent import job_locks
+from app.agent.job_events import JobEventStream, job_events
+from app.agent.job_queue import JobRecord, job_queue
+from app.agent.retention import restore_workspace
+from app.api.schemas import JobStatusResponse, WorkspaceRestoreResponse
+
+router = APIRouter(tags=["jobs"])
+
+
+def _to_response(record: JobRecord) -> JobStatusResponse:
+    data = asdict(record)
+    data.pop("prompt", None)
+    return JobStatusResponse(**data)
+
+
+@router.get("/jobs", response_model=list[JobStatusResponse])
+async def list_jobs():
+    """List known jobs, newest first."""
+    return [_to_response(record) for record in job_queue.list_jobs()]
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """Return the current status and stage of a job."""
+    record = job_queue.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _to_response(record)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobStatusResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job and free its worker slot.
+
+    Queued jobs come back cancelled. A running job comes back with stage
+    ``cancelling`` and reaches ``cancelled`` once its processes are gone.
+    """
+    record = job_queue.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if record.finished:
+        raise HTTPException(status_code=409, detail=f"Job already {record.status}")
+    return _to_response(job_queue.cancel(job_id) or record)
+
+
+@router.post("/jobs/{job_id}/restore", response_model=WorkspaceRestoreResponse)
+async def restore_job_workspace(job_id: str):
+    """Rebuild a compacted job workspace so its project can be reopened."""
+    if job_queue.is_active(job_id) or job_locks.is_held(job_id):
+        raise HTTPException(status_code=409, detail="Job is still active")
+    try:
+        result = await asyncio.to_thread(restore_workspace, Path(job_id).name)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Job workspace not found")
+    return WorkspaceRestoreResponse(job_id=job_id, **result._asdict())
+
+
+async def _sse(stream: JobEventStream, last_event_id: int) -> AsyncIterator[str]:
+    async for event in stream.subscribe(last_event_id):
+        if event is None:
+            yield ": keep-alive\n\n"
+            continue
+        yield (
+            f"id: {event.id}\n"
+            f"event: {event.type}\n"
+            f"data: {json.dumps(event.data, default=str)}\n\n"
+        )
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    last_event_id: int = 0,
+    last_event_id_header: str | None = Header(default=None, alias="Last-Event-ID"),
+):
+    """Stream a job's status, stage, agent and render progress as SSE.
+
+    Reconnecting clients resume after ``Last-Event-ID`` (header or query
+    parameter); events still in the replay buffer are sent again first.
+    """
+    stream = job_events.get(job_id)
+    if stream is None:
+        record = job_queue.get(job_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        # Finished job whose stream was evicted: replay just its final status.
+        job_events.publish(
+            job_id, "status", **_to_response(record).model_dump(mode="json")
+        )
+        job_events.close(job_id)
+        stream = job_events.get(job_id)
+
+    if last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+
+    return StreamingResponse(
+        _sse(stream, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
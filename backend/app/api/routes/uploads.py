@@ -1,21 +1,68 @@
 """File upload routes for managing user documents."""
 
+import asyncio
+import fcntl
 import json
 import mimetypes
-import subprocess
+import os
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
-from fastapi import APIRouter, Form, HTTPException, UploadFile
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 
-from app.agent.upload_assets import _is_sidecar
+from app.agent import metrics, upload_catalog
+from app.agent.media_processing import (
+    generate_filmstrip,
+    generate_image_thumbnail,
+    generate_video_thumbnail,
+    probe_media,
+)
+from app.agent.media_workers import media_workers, proxy_workers
+from app.agent.upload_proxies import (
+    build_image_proxy,
+    build_proxy,
+    release_proxy,
+)
+from app.agent.upload_store import (
+    UploadTooLargeError,
+    materialize,
+    release_object,
+    reserve_name,
+)
+from app.api.upload_stream import InvalidUploadError, receive_upload
 from app.config import settings
 
 router = APIRouter(tags=["uploads"])
 THUMB_DIR_NAME = ".thumb"
-THUMBNAIL_SEEK_SECONDS = 0.5
+FILMSTRIP_DIR_NAME = ".filmstrip"
+METADATA_LOCK_DIR_NAME = ".locks"
+PROBED_MIME_PREFIXES = ("video/", "audio/", "image/")
+
+# The upload form is parsed by hand (see app.api.upload_stream), so describe
+# it for the OpenAPI docs explicitly.
+_UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "description": {"type": "string", "default": ""},
+                    },
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
 
 
 class UploadedFileInfo(BaseModel):
@@ -25,6 +72,7 @@ class UploadedFileInfo(BaseModel):
     description: str = ""
     uploaded_at: str = ""
     has_thumbnail: bool = False
+    has_filmstrip: bool = False
 
 
 def _metadata_path(file_path: Path) -> Path:
@@ -32,6 +80,23 @@ def _metadata_path(file_path: Path) -> Path:
     return file_path.parent / f"{file_path.name}.json"
 
 
+@contextmanager
+def _metadata_lock(file_path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on *file_path*'s sidecar, across processes.
+
+    Lock files are never deleted, since unlinking a lock file while another
+    process waits on it would let two writers in at once.
+    """
+    lock_dir = file_path.parent / METADATA_LOCK_DIR_NAME
+    lock_dir.mkdir(exist_ok=True)
+    with open(lock_dir / f"{file_path.name}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
 def _thumb_dir(upload_dir: Path) -> Path:
     """Return the thumbnail directory inside uploads."""
     return upload_dir / THUMB_DIR_NAME
@@ -42,8 +107,23 @@ def _thumbnail_path(file_path: Path) -> Path:
     return _thumb_dir(file_path.parent) / f"{file_path.name}.jpg"
 
 
+def _filmstrip_paths(file_path: Path) -> tuple[Path, Path]:
+    """Return the sprite sheet and JSON index paths for an uploaded video."""
+    filmstrip_dir = file_path.parent / FILMSTRIP_DIR_NAME
+    return (
+        filmstrip_dir / f"{file_path.name}.jpg",
+        filmstrip_dir / f"{file_path.name}.json",
+    )
+
+
 def _write_metadata(
-    file_path: Path, *, original_name: str, description: str, thumbnail_name: str = ""
+    file_path: Path,
+    *,
+    original_name: str,
+    description: str,
+    thumbnail_name: str = "",
+    sha256: str = "",
+    probe: dict | None = None,
 ) -> dict:
     """Write sidecar JSON metadata for an uploaded file. Returns the metadata dict."""
     mime_type, _ = mimetypes.guess_type(file_path.name)
@@ -55,8 +135,40 @@ def _write_metadata(
         "size": file_path.stat().st_size,
         "mime_type": mime_type or "application/octet-stream",
         "thumbnail_name": thumbnail_name,
+        "sha256": sha256,
+        "probe": probe,
     }
-    _metadata_path(file_path).write_text(json.dumps(metadata, indent=2))
+    with _metadata_lock(file_path):
+        _save_metadata(file_path, metadata)
+    return metadata
+
+
+def _save_metadata(file_path: Path, metadata: dict) -> None:
+    """Atomically replace the sidecar JSON for *file_path*.
+
+    Callers hold :func:`_metadata_lock`; the temp name is unique as well so
+    an unlocked writer can never clobber it.
+    """
+    meta_path = _metadata_path(file_path)
+    tmp_path = meta_path.with_name(f".{meta_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp_path.write_text(json.dumps(metadata, indent=2))
+        os.replace(tmp_path, meta_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    upload_catalog.upsert(file_path, metadata)
+
+
+def _update_metadata(file_path: Path, **fields: object) -> dict | None:
+    """Merge *fields* into an existing sidecar. Returns None if the upload is gone."""
+    with _metadata_lock(file_path):
+        if not file_path.exists():
+            return None
+        metadata = _read_metadata(file_path)
+        if metadata is None:
+            return None
+        metadata.update(fields)
+        _save_metadata(file_path, metadata)
     return metadata
 
 
@@ -71,118 +183,180 @@ def _read_metadata(file_path: Path) -> dict | None:
         return None
 
 
-def _has_thumbnail(file_path: Path, meta: dict | None) -> bool:
-    """Check whether a file has a valid generated thumbnail."""
-    if not meta:
-        return False
-    thumbnail_name = meta.get("thumbnail_name", "")
-    if not thumbnail_name:
-        return False
-    return (_thumb_dir(file_path.parent) / Path(thumbnail_name).name).exists()
-
+def _file_info(
+    file_path: Path, meta: dict, size: int | None = None
+) -> UploadedFileInfo:
+    """Build the API response for an uploaded file from its metadata."""
+    return UploadedFileInfo(
+        name=file_path.name,
+        size=meta.get("size", 0) if size is None else size,
+        type=meta.get("mime_type", "application/octet-stream"),
+        description=meta.get("description", ""),
+        uploaded_at=meta.get("uploaded_at", ""),
+        has_thumbnail=bool(meta.get("thumbnail_name")),
+        has_filmstrip=bool(meta.get("filmstrip_name")),
+    )
 
-def _generate_video_thumbnail(file_path: Path, mime_type: str) -> str:
-    """Generate thumbnail at 0.5s for video files. Returns thumbnail filename."""
-    if not mime_type.startswith("video/"):
-        return ""
 
+async def _generate_thumbnail(file_path: Path, mime_type: str) -> None:
+    """Write the upload's thumbnail into .thumb/ and record it in the sidecar."""
+    if mime_type.startswith("video/"):
+        generate = generate_video_thumbnail
+    elif mime_type.startswith("image/"):
+        generate = generate_image_thumbnail
+    else:
+        return
     thumbnail_path = _thumbnail_path(file_path)
-    thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
-    command = [
-        "ffmpeg",
-        "-y",
-        "-ss",
-        str(THUMBNAIL_SEEK_SECONDS),
-        "-i",
-        str(file_path),
-        "-frames:v",
-        "1",
-        "-q:v",
-        "2",
-        str(thumbnail_path),
-    ]
-    try:
-        subprocess.run(
-            command,
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+    started = time.perf_counter()
+    ok = await generate(file_path, thumbnail_path)
+    metrics.thumbnail_duration_seconds.observe(
+        time.perf_counter() - started, outcome="ok" if ok else "error"
+    )
+    if ok:
+        if not _update_metadata(file_path, thumbnail_name=thumbnail_path.name):
+            thumbnail_path.unlink(missing_ok=True)
+
+
+async def _generate_filmstrip(file_path: Path, probe: dict | None) -> None:
+    """Write the video's scrubbing sprite sheet and index, then record them."""
+    if not probe or not probe.get("duration_seconds") or not probe.get("width"):
+        return
+    sheet_path, index_path = _filmstrip_paths(file_path)
+    index = await generate_filmstrip(
+        file_path,
+        sheet_path,
+        duration=probe["duration_seconds"],
+        width=probe["width"],
+        height=probe["height"],
+        frame_count=settings.filmstrip_frame_count,
+        tile_width=settings.filmstrip_tile_width,
+    )
+    if index is None:
+        return
+    tmp_path = index_path.with_name(f".{index_path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(json.dumps(index))
+    os.replace(tmp_path, index_path)
+    if not _update_metadata(file_path, filmstrip_name=sheet_path.name):
+        sheet_path.unlink(missing_ok=True)
+        index_path.unlink(missing_ok=True)
+
+
+async def _process_upload(file_path: Path, meta: dict) -> None:
+    """Run background media processing for a new upload and update its sidecar.
+
+    The render proxy is handed to ``proxy_workers`` once the previews are
+    done, so long encodes never delay other uploads' thumbnails.
+    """
+    mime_type = meta["mime_type"]
+    await _generate_thumbnail(file_path, mime_type)
+    if not file_path.exists():
+        return
+    if mime_type.startswith("video/"):
+        await _generate_filmstrip(file_path, meta.get("probe"))
+    if mime_type.startswith(("video/", "image/")):
+        proxy_workers.submit(
+            lambda: _build_render_proxy(file_path, meta),
+            name=f"build_proxy:{file_path.name}",
         )
-    except (OSError, subprocess.SubprocessError):
-        return ""
 
-    return thumbnail_path.name if thumbnail_path.exists() else ""
+
+async def _build_render_proxy(file_path: Path, meta: dict) -> None:
+    """Build the upload's render proxy and record the proxy's own probe.
+
+    Jobs link the proxy in place of the original, so prompts describe the
+    file from ``proxy_probe``: its scaled size, with rotation already applied.
+    """
+    if not file_path.exists():
+        return
+    mime_type, digest, probe = meta["mime_type"], meta["sha256"], meta.get("probe")
+    if mime_type.startswith("video/"):
+        proxy = await build_proxy(file_path, digest, probe)
+    else:
+        proxy = await build_image_proxy(file_path, digest, mime_type, probe)
+    if proxy is not None:
+        proxy_probe = await probe_media(proxy)
+        if proxy_probe is not None:
+            _update_metadata(file_path, proxy_probe=proxy_probe)
+    # The upload may have been deleted while the proxy was encoding
+    release_proxy(digest)
 
 
 @router.get("/uploads", response_model=list[UploadedFileInfo])
 async def list_uploads():
-    """List all files in the uploads directory."""
-    upload_dir = settings.upload_dir
-    if not upload_dir.exists():
-        return []
-
-    files: list[UploadedFileInfo] = []
-    for item in sorted(upload_dir.iterdir()):
-        if not item.is_file() or item.name.startswith(".") or _is_sidecar(item):
-            continue
-
-        meta = _read_metadata(item)
-        mime_type, _ = mimetypes.guess_type(item.name)
-        files.append(
-            UploadedFileInfo(
-                name=item.name,
-                size=item.stat().st_size,
-                type=mime_type or "application/octet-stream",
-                description=meta.get("description", "") if meta else "",
-                uploaded_at=meta.get("uploaded_at", "") if meta else "",
-                has_thumbnail=_has_thumbnail(item, meta),
-            )
-        )
-    return files
+    """List all uploaded files from the upload catalog."""
+    return [
+        _file_info(settings.upload_dir / entry.name, entry.metadata, size=entry.size)
+        for entry in upload_catalog.entries()
+    ]
 
 
-@router.post("/uploads", response_model=UploadedFileInfo)
-async def upload_file(file: UploadFile, description: str = Form("")):
-    """Upload a file to the uploads directory."""
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No filename provided")
+@router.post(
+    "/uploads", response_model=UploadedFileInfo, openapi_extra=_UPLOAD_FORM_SCHEMA
+)
+async def upload_file(request: Request):
+    """Upload a file to the uploads directory.
 
+    The file part is streamed straight into the upload store, so oversized
+    uploads are rejected on their Content-Length or as soon as the limit is
+    crossed, and the bytes are written to disk once.
+    """
     upload_dir = settings.upload_dir
     upload_dir.mkdir(parents=True, exist_ok=True)
 
+    try:
+        upload = await receive_upload(
+            request, file_field="file", max_bytes=settings.max_upload_bytes
+        )
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except InvalidUploadError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    digest, obj, size = upload.digest, upload.object_path, upload.size
+    description = upload.fields.get("description", "")
+
     # Sanitize filename -- keep only the basename to prevent path traversal
-    safe_name = Path(file.filename).name
+    safe_name = Path(upload.filename).name
     dest = upload_dir / safe_name
 
-    # If a file with the same name exists, add a numeric suffix
-    counter = 1
-    stem = dest.stem
-    suffix = dest.suffix
-    while dest.exists():
-        dest = upload_dir / f"{stem}_{counter}{suffix}"
-        counter += 1
+    metrics.upload_bytes_total.inc(size)
+
+    # Identical re-upload under the same name: reuse the existing entry
+    existing = _read_metadata(dest) if dest.exists() else None
+    if existing and existing.get("sha256") == digest:
+        metrics.uploads_total.inc(result="duplicate")
+        return _file_info(dest, existing)
+    metrics.uploads_total.inc(result="stored")
 
-    contents = await file.read()
-    dest.write_bytes(contents)
+    # Claim a free name (adding a numeric suffix if needed), then swap the
+    # stored object into place
+    dest = reserve_name(upload_dir, safe_name)
+    try:
+        materialize(obj, dest)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+
+    # Probe once at ingest so prompts can state duration, size and audio
+    # without the agent having to run ffprobe itself
+    mime_type, _ = mimetypes.guess_type(dest.name)
+    probe = None
+    if mime_type and mime_type.startswith(PROBED_MIME_PREFIXES):
+        probe = await probe_media(dest)
 
-    mime_type = mimetypes.guess_type(dest.name)[0] or "application/octet-stream"
-    thumbnail_name = _generate_video_thumbnail(dest, mime_type)
     meta = _write_metadata(
         dest,
         original_name=safe_name,
         description=description,
-        thumbnail_name=thumbnail_name,
+        sha256=digest,
+        probe=probe,
     )
-
-    return UploadedFileInfo(
-        name=dest.name,
-        size=len(contents),
-        type=meta["mime_type"],
-        description=meta["description"],
-        uploaded_at=meta["uploaded_at"],
-        has_thumbnail=bool(meta.get("thumbnail_name")),
+    media_workers.submit(
+        lambda: _process_upload(dest, meta),
+        name=f"process_upload:{dest.name}",
     )
 
+    return _file_info(dest, meta)
+
 
 @router.delete("/uploads/{filename}")
 async def delete_upload(filename: str):
@@ -195,6 +369,10 @@ async def delete_upload(filename: str):
     meta = _read_metadata(file_path)
     thumbnail_name = meta.get("thumbnail_name", "") if meta else ""
     file_path.unlink()
+    upload_catalog.remove(file_path.name)
+    digest = meta.get("sha256", "") if meta else ""
+    release_object(digest)
+    release_proxy(digest)
 
     meta_path = _metadata_path(file_path)
     if meta_path.exists():
@@ -205,6 +383,9 @@ async def delete_upload(filename: str):
         if thumbnail_path.exists():
             thumbnail_path.unlink()
 
+    for path in _filmstrip_paths(file_path):
+        path.unlink(missing_ok=True)
+
     return {"detail": "deleted"}
 
 
@@ -220,7 +401,7 @@ async def serve_upload(filename: str):
 
 @router.get("/uploads/{filename}/thumbnail")
 async def serve_upload_thumbnail(filename: str):
-    """Serve generated thumbnail for an uploaded video."""
+    """Serve the generated thumbnail for an uploaded video or image."""
     safe_name = Path(filename).name
     file_path = settings.upload_dir / safe_name
     if not file_path.exists() or not file_path.is_file():
@@ -236,3 +417,21 @@ async def serve_upload_thumbnail(filename: str):
         raise HTTPException(status_code=404, detail="Thumbnail not found")
 
     return FileResponse(thumbnail_path)
+
+
+@router.get("/uploads/{filename}/filmstrip")
+async def serve_upload_filmstrip(filename: str):
+    """Serve the sprite sheet of evenly spaced frames for an uploaded video."""
+    sheet_path, _ = _filmstrip_paths(settings.upload_dir / Path(filename).name)
+    if not sheet_path.is_file():
+        raise HTTPException(status_code=404, detail="Filmstrip not found")
+    return FileResponse(sheet_path, media_type="image/jpeg")
+
+
+@router.get("/uploads/{filename}/filmstrip/index")
+async def serve_upload_filmstrip_index(filename: str):
+    """Serve the filmstrip's tile layout and the timestamp of each frame."""
+    _, index_path = _filmstrip_paths(settings.upload_dir / Path(filename).name)
+    if not index_path.is_file():
+        raise HTTPException(status_code=404, detail="Filmstrip not found")
+    return FileResponse(index_path, media_type="application/json")
@@ -1,17 +1,28 @@
 """Video creation routes for Remotion agent rendering."""
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+import asyncio
+from pathlib import Path
 
-from app.agent import orchestrator
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse, Response
+
+from app.agent import result_index
 from app.agent.job_ids import next_job_id
-from app.agent.observability import get_logfire
+from app.agent.job_queue import JobRecord, QueueFullError, job_queue
+from app.agent.packaging import hls_dir
+from app.agent.publishing import final_video_path, read_manifest
+from app.agent.upload_assets import asset_snapshot
 from app.agent.video_styles import list_styles
 from app.api.schemas import VideoCreateRequest, VideoCreateResponse
 from app.config import settings
 
 router = APIRouter(tags=["videos"])
 
+_HLS_MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
 
 @router.get("/video-styles")
 async def get_video_styles():
@@ -19,47 +30,78 @@ async def get_video_styles():
     return list_styles()
 
 
+def _match_request(request: VideoCreateRequest) -> tuple[str | None, str | None]:
+    """Return the request's result key and a finished render for it. Blocking."""
+    assets = asset_snapshot(use_proxies=not request.use_original_assets)
+    key = result_index.request_key(request.prompt, request.video_style, assets)
+    if key is None or request.fresh:
+        return key, None
+    return key, result_index.lookup(key)
+
+
 @router.post("/videos/create", response_model=VideoCreateResponse)
 async def create_video(request: VideoCreateRequest):
-    """Render a Remotion video from a prompt."""
-    logfire = get_logfire()
+    """Queue a Remotion video render and return its job id immediately."""
     job_id = next_job_id(settings.remotion_jobs_path)
+    result_key, finished_job_id = await asyncio.to_thread(_match_request, request)
+    record = JobRecord(
+        job_id=job_id,
+        prompt=request.prompt,
+        video_style=request.video_style,
+        bypass_prompt_cache=request.bypass_prompt_cache,
+        use_original_assets=request.use_original_assets,
+        result_key=result_key,
+    )
 
     try:
-        result = await orchestrator.run(
-            job_id,
-            request.prompt,
-            video_style=request.video_style,
-        )
-
-        if not result or not result.get("output_path"):
-            raise RuntimeError("Agent execution returned no output")
-
-    except Exception as exc:
-        logfire.error(
-            "video_creation_failed",
-            job_id=job_id,
-            error=str(exc),
-            error_type=type(exc).__name__,
-        )
-        return VideoCreateResponse(
-            job_id=job_id,
-            status="failed",
-            error=str(exc),
+        job_queue.submit(
+            record,
+            reuse_results=not request.fresh,
+            finished_job_id=finished_job_id,
         )
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
 
     return VideoCreateResponse(
         job_id=job_id,
-        status="complete",
-        output_path=result["output_path"],
-        job_project_path=result["job_project_path"],
+        status=record.status,
+        output_path=record.output_path,
+        job_project_path=record.job_project_path,
+        error=record.error,
     )
 
 
 @router.get("/jobs/{job_id}/video")
-async def download_video(job_id: str):
-    """Download the rendered video file."""
-    video_path = settings.output_dir / f"{job_id}.mp4"
+async def download_video(
+    job_id: str, if_none_match: str | None = Header(default=None)
+):
+    """Download the rendered video file.
+
+    The ETag is the content hash from the publish manifest, so clients can
+    revalidate cached copies with ``If-None-Match``.
+    """
+    job_id = Path(job_id).name
+    video_path = final_video_path(job_id)
     if not video_path.exists():
         raise HTTPException(status_code=404, detail="Video not found")
-    return FileResponse(video_path)
+
+    manifest = read_manifest(job_id)
+    if manifest is None:
+        return FileResponse(video_path)
+    etag = f'"{manifest["sha256"]}"'
+    if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(video_path, headers={"ETag": etag})
+
+
+@router.get("/jobs/{job_id}/hls/{asset_path:path}")
+async def serve_hls(job_id: str, asset_path: str):
+    """Serve a job's HLS master playlist, rendition playlists and segments."""
+    root = hls_dir(Path(job_id).name).resolve()
+    file_path = (root / asset_path).resolve()
+    if not file_path.is_relative_to(root) or not file_path.is_file():
+        raise HTTPException(status_code=404, detail="HLS asset not found")
+    return FileResponse(
+        file_path,
+        media_type=_HLS_MEDIA_TYPES.get(file_path.suffix, "application/octet-stream"),
+    )
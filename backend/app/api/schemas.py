@@ -11,6 +11,18 @@ class VideoCreateRequest(BaseModel):
         default=VideoStyle.GENERAL,
         description="The video production style to apply during prompt enhancement.",
     )
+    bypass_prompt_cache: bool = Field(
+        default=False,
+        description="Always call the prompt enhancer instead of reusing a cached brief.",
+    )
+    use_original_assets: bool = Field(
+        default=False,
+        description="Render from the uploaded originals instead of their render proxies.",
+    )
+    fresh: bool = Field(
+        default=False,
+        description="Render a new video even if an identical request already has one.",
+    )
 
 
 class VideoCreateResponse(BaseModel):
@@ -19,3 +31,25 @@ class VideoCreateResponse(BaseModel):
     output_path: str | None = None
     job_project_path: str | None = None
     error: str | None = None
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: str = ""
+    video_style: VideoStyle = VideoStyle.GENERAL
+    created_at: str = ""
+    started_at: str = ""
+    finished_at: str = ""
+    output_path: str | None = None
+    job_project_path: str | None = None
+    hls_path: str | None = None
+    source_job_id: str | None = None
+    error: str | None = None
+
+
+class WorkspaceRestoreResponse(BaseModel):
+    job_id: str
+    job_project_path: str
+    restored: bool
+    missing_assets: list[str] = []
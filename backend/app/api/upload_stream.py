@@ -0,0 +1,159 @@
+"""Streaming ``multipart/form-data`` parsing for the upload endpoint.
+
+Starlette's form parser spools every file part to a temp file before the
+route runs, so a size limit can only be enforced after the whole body has
+been received, and every byte is written to disk twice. This parser feeds
+the file part straight into the upload store as it arrives.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import NamedTuple
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+from app.agent.upload_store import ObjectWriter, UploadTooLargeError
+from app.config import settings
+
+# Allowance for multipart boundaries, part headers and small text fields
+# when rejecting a request early on its Content-Length.
+FORM_OVERHEAD_BYTES = 1024 * 1024
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class InvalidUploadError(ValueError):
+    """Raised when the request body is not a usable upload form."""
+
+
+class ReceivedUpload(NamedTuple):
+    """A file part stored in the upload store, plus the form's text fields."""
+
+    filename: str
+    fields: dict[str, str]
+    digest: str
+    object_path: Path
+    size: int
+
+
+async def receive_upload(
+    request: Request, *, file_field: str, max_bytes: int
+) -> ReceivedUpload:
+    """Read a multipart upload form from *request* as it streams in.
+
+    The *file_field* part is hashed and written to the upload store in
+    ``settings.upload_chunk_size`` blocks, off the event loop. Raises
+    UploadTooLargeError as soon as the declared Content-Length or the bytes
+    received exceed *max_bytes*, and InvalidUploadError for malformed or
+    incomplete forms.
+    """
+    content_type, params = parse_options_header(
+        request.headers.get("content-type", "")
+    )
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUploadError("Expected a multipart/form-data body")
+
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes + FORM_OVERHEAD_BYTES:
+        raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+
+    fields: dict[str, str] = {}
+    headers: dict[bytes, bytes] = {}
+    header_field = bytearray()
+    header_value = bytearray()
+    part_name = ""
+    field_value = bytearray()
+    in_file = False
+    filename = ""
+    writer: ObjectWriter | None = None
+    pending = bytearray()
+    ended = False
+
+    def on_part_begin() -> None:
+        headers.clear()
+        field_value.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        nonlocal part_name, in_file, filename, writer
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        part_name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        in_file = part_name == file_field and b"filename" in options
+        if in_file:
+            if writer is not None:
+                raise InvalidUploadError(f"More than one {file_field!r} part")
+            filename = options[b"filename"].decode("utf-8", errors="replace")
+            if not Path(filename).name:
+                raise InvalidUploadError("No filename provided")
+            writer = ObjectWriter(max_bytes)
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if in_file:
+            pending.extend(data[start:end])
+            return
+        field_value.extend(data[start:end])
+        if len(field_value) > MAX_FIELD_BYTES:
+            raise InvalidUploadError(f"Form field {part_name!r} is too large")
+
+    def on_part_end() -> None:
+        if not in_file:
+            fields[part_name] = field_value.decode("utf-8", errors="replace")
+
+    def on_end() -> None:
+        nonlocal ended
+        ended = True
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": on_part_begin,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_end": on_end,
+        },
+    )
+
+    async def flush() -> None:
+        if writer is not None and pending:
+            chunk = bytes(pending)
+            pending.clear()
+            await asyncio.to_thread(writer.write, chunk)
+
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except MultipartParseError as exc:
+                raise InvalidUploadError(f"Malformed multipart body: {exc}") from exc
+            if len(pending) >= settings.upload_chunk_size:
+                await flush()
+        parser.finalize()
+        if not ended:
+            raise InvalidUploadError("Multipart body ended before its closing boundary")
+        await flush()
+        if writer is None:
+            raise InvalidUploadError(f"Missing {file_field!r} file part")
+        digest, obj, size = await asyncio.to_thread(writer.commit)
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+    return ReceivedUpload(filename, fields, digest, obj, size)
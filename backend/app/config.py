@@ -1,6 +1,7 @@
 """Application configuration loaded from environment variables."""
 
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings
 
@@ -24,13 +25,67 @@ class Settings(BaseSettings):
     remotion_jobs_path: Path = _BACKEND_DIR / "remotion_jobs"
     upload_dir: Path = _BACKEND_DIR / "uploads"
     output_dir: Path = _BACKEND_DIR / "final_vids"
+    prompt_cache_dir: Path = _BACKEND_DIR / "prompt_cache"
+    bundle_cache_dir: Path = _BACKEND_DIR / "bundle_cache"
 
     # Rendering
     max_render_timeout: int = 600
+    max_job_timeout: int = 1800
+    prompt_enhancement_timeout: int = 120
+    packaging_timeout: int = 600
     claude_model: str = "claude-sonnet-4-5"
     default_fps: int = 30
     default_width: int = 1920
     default_height: int = 1080
+    prebundle_on_startup: bool = True
+    render_mode: Literal["single", "chunked"] = "single"
+    render_chunk_count: int = 8
+    render_chunk_concurrency: int = 4
+    preview_scale: float = 0.25
+    preview_max_frames: int = 12
+    preview_concurrency: int = 4
+
+    # Packaging
+    hls_enabled: bool = True
+    hls_renditions: list[int] = [1080, 720, 480]
+    hls_timeout: int = 600
+
+    # Uploads
+    max_upload_bytes: int = 4 * 1024 * 1024 * 1024
+    upload_chunk_size: int = 1024 * 1024
+    media_worker_concurrency: int = 2
+    filmstrip_frame_count: int = 20
+    filmstrip_tile_width: int = 160
+
+    # Render proxies for uploads
+    proxy_enabled: bool = True
+    proxy_max_width: int = 1920
+    proxy_max_height: int = 1080
+    proxy_keyframe_interval_seconds: float = 0.5
+    proxy_crf: int = 18
+    image_proxy_enabled: bool = True
+    proxy_worker_concurrency: int = 1
+
+    # Prompt enhancement cache
+    prompt_cache_max_entries: int = 256
+    prompt_cache_ttl_seconds: int = 7 * 24 * 60 * 60
+    prompt_cache_max_disk_entries: int = 4096
+
+    # Job queue
+    max_concurrent_jobs: int = 2
+    max_queued_jobs: int = 100
+    max_job_records: int = 1000
+    job_event_buffer_size: int = 200
+    job_event_max_streams: int = 1000
+
+    # Workspaces
+    workspace_pool_size: int = 2
+
+    # Retention (0 disables a policy)
+    workspace_compact_after_seconds: int = 24 * 60 * 60
+    storage_budget_bytes: int = 0
+    retention_evict_outputs: bool = False
+    retention_sweep_interval_seconds: int = 600
 
     model_config = {
         "env_file": _BACKEND_DIR / ".env",
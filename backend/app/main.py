@@ -1,12 +1,20 @@
 """Renderwood FastAPI application."""
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.agent import metrics, upload_catalog
+from app.agent.bundle_cache import log_prebundle_result, prebundle_template
+from app.agent.job_queue import job_queue
+from app.agent.media_workers import media_workers, proxy_workers
 from app.agent.observability import configure_observability
-from app.api.routes import uploads, videos
+from app.agent.retention import retention_manager
+from app.agent.workspaces import template_fingerprint, workspace_pool
+from app.api.routes import jobs, uploads, videos
 from app.config import settings
 
 
@@ -22,7 +30,27 @@ async def lifespan(app: FastAPI):
     settings.upload_dir.mkdir(parents=True, exist_ok=True)
     props_dir = settings.remotion_project_path / "props"
     props_dir.mkdir(parents=True, exist_ok=True)
-    yield
+    await asyncio.to_thread(upload_catalog.reconcile)
+    # Hash the template now rather than on the first request's event loop
+    await asyncio.to_thread(template_fingerprint)
+    await workspace_pool.start()
+    await job_queue.start()
+    await retention_manager.start(is_active=job_queue.is_active)
+    prebundle_task = None
+    if settings.prebundle_on_startup:
+        prebundle_task = asyncio.create_task(prebundle_template())
+        prebundle_task.add_done_callback(log_prebundle_result)
+    try:
+        yield
+    finally:
+        if prebundle_task is not None:
+            prebundle_task.cancel()
+            await asyncio.gather(prebundle_task, return_exceptions=True)
+        await retention_manager.stop()
+        await job_queue.stop()
+        await workspace_pool.stop()
+        await media_workers.stop()
+        await proxy_workers.stop()
 
 
 app = FastAPI(
@@ -42,8 +70,14 @@ app.add_middleware(
 
 app.include_router(videos.router, prefix="/api")
 app.include_router(uploads.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render_latest(), media_type=metrics.CONTENT_TYPE)
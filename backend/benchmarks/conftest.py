@@ -0,0 +1,178 @@
+"""Shared fixtures for the offline backend benchmark suite.
+
+Every benchmark runs against a throwaway copy of the backend's directories:
+``settings`` paths are pointed into a temp dir, the module-level singletons
+that captured real paths at import time are swapped for temp-backed ones, and
+the Claude SDK and Fireworks calls are replaced with instant stubs. Nothing
+touches the network or the developer's real uploads and jobs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import sys
+from collections.abc import Callable, Coroutine, Iterator
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(_BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(_BACKEND_DIR))
+
+# agent_factory builds its Fireworks provider at import time and rejects an
+# empty key, so give it a dummy one before any ``app`` import.
+os.environ.setdefault("FIREWORKS_API_KEY", "bench")
+
+import logfire  # noqa: E402
+
+from app.agent import bundle_cache, orchestrator, prompt_enhancer  # noqa: E402
+from app.agent.prompt_cache import PromptCache  # noqa: E402
+from app.agent.workspaces import WorkspacePool, template_fingerprint  # noqa: E402
+from app.config import settings  # noqa: E402
+
+# Dataset sizes; override through the environment for quick local runs.
+JOB_COUNT = int(os.environ.get("BENCH_JOB_COUNT", 10_000))
+UPLOAD_COUNT = int(os.environ.get("BENCH_UPLOAD_COUNT", 10_000))
+LARGE_FILE_COUNT = int(os.environ.get("BENCH_LARGE_FILE_COUNT", 4))
+LARGE_FILE_MB = int(os.environ.get("BENCH_LARGE_FILE_MB", 64))
+# Benchmark against the real Remotion template (requires its node_modules).
+USE_REAL_TEMPLATE = os.environ.get("BENCH_REAL_TEMPLATE") == "1"
+
+MIB = 1024 * 1024
+
+Runner = Callable[[Coroutine[Any, Any, Any]], Any]
+
+
+def write_random_file(path: Path, size: int) -> None:
+    """Write *size* bytes of incompressible data to *path*."""
+    block = os.urandom(MIB)
+    with path.open("wb") as fh:
+        remaining = size
+        while remaining > 0:
+            fh.write(block[: min(MIB, remaining)])
+            remaining -= MIB
+
+
+def _build_fake_template(root: Path) -> Path:
+    """Create a template shaped like ``remotion_project`` without npm."""
+    template = root / "remotion_project"
+    (template / "src").mkdir(parents=True)
+    for index in range(40):
+        (template / "src" / f"Scene{index}.tsx").write_text(
+            f"export const Scene{index} = () => null;\n" * 50
+        )
+    music = template / "public" / "music"
+    music.mkdir(parents=True)
+    for track in ("dramatic", "mysterious", "speeding_up_dramatic"):
+        write_random_file(music / f"{track}.mp3", 2 * MIB)
+    modules = template / "node_modules"
+    for index in range(200):
+        package = modules / f"pkg{index}"
+        package.mkdir(parents=True)
+        (package / "index.js").write_text("module.exports = {};\n")
+    (template / "package.json").write_text('{"name": "bench-template"}\n')
+    (template / "package-lock.json").write_text('{"lockfileVersion": 3}\n')
+    (template / "remotion.config.js").write_text("// bench\n")
+    return template
+
+
+@pytest.fixture(scope="session", autouse=True)
+def bench_root(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Path]:
+    """Point the backend at a temp tree for the whole session."""
+    root = tmp_path_factory.mktemp("renderwood-bench")
+    logfire.configure(send_to_logfire=False, console=False)
+
+    template = (
+        settings.remotion_project_path
+        if USE_REAL_TEMPLATE
+        else _build_fake_template(root)
+    )
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "remotion_project_path", template)
+        mp.setattr(settings, "remotion_jobs_path", root / "remotion_jobs")
+        mp.setattr(settings, "upload_dir", root / "uploads")
+        mp.setattr(settings, "output_dir", root / "final_vids")
+        mp.setattr(settings, "prompt_cache_dir", root / "prompt_cache")
+        mp.setattr(settings, "bundle_cache_dir", root / "bundle_cache")
+        mp.setattr(settings, "hls_enabled", False)
+        mp.setattr(
+            orchestrator, "workspace_pool", WorkspacePool(root / ".pool", size=0)
+        )
+        template_fingerprint.cache_clear()
+        bundle_cache.cache_dir.cache_clear()
+        yield root
+    template_fingerprint.cache_clear()
+    bundle_cache.cache_dir.cache_clear()
+
+
+@pytest.fixture
+def run() -> Iterator[Runner]:
+    """Run a coroutine to completion on a dedicated event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        yield loop.run_until_complete
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def fresh_dir(bench_root: Path, request: pytest.FixtureRequest) -> Iterator[Path]:
+    """An empty directory unique to the requesting benchmark."""
+    path = bench_root / request.node.name.replace("[", "-").replace("]", "")
+    path.mkdir()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+class _StubEnhancerAgent:
+    """Stands in for the Fireworks-backed pydantic-ai agent."""
+
+    async def run(self, prompt: str) -> SimpleNamespace:
+        return SimpleNamespace(output=f"Enhanced brief for: {prompt}")
+
+
+@pytest.fixture
+def stub_models(
+    bench_root: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Replace the Claude agent run and the prompt enhancer model with stubs.
+
+    The agent stub writes a tiny MP4 where the real agent would render, and
+    ffmpeg/ffprobe post-processing is skipped, so the orchestrator's own
+    bookkeeping is all that is measured.
+    """
+
+    async def fake_run_agent(
+        prompt: str, options: Any, output_dir: Path, *args: Any, **kwargs: Any
+    ) -> Path:
+        output_path = output_dir / "video.mp4"
+        output_path.write_bytes(b"\0" * 4096)
+        return output_path
+
+    async def no_ffmpeg(*args: Any, **kwargs: Any) -> None:
+        return None
+
+    monkeypatch.setattr(settings, "fireworks_api_key", "bench")
+    monkeypatch.setattr(
+        prompt_enhancer,
+        "get_prompt_enhancer_agent",
+        lambda style, base_prompt: _StubEnhancerAgent(),
+    )
+    monkeypatch.setattr(
+        prompt_enhancer,
+        "prompt_cache",
+        PromptCache(
+            bench_root / "prompt_cache",
+            max_entries=256,
+            ttl_seconds=3600,
+            max_disk_entries=4096,
+        ),
+    )
+    monkeypatch.setattr(orchestrator, "_run_agent", fake_run_agent)
+    monkeypatch.setattr(orchestrator, "remux_faststart", no_ffmpeg)
+    monkeypatch.setattr("app.agent.publishing.probe_duration", no_ffmpeg)
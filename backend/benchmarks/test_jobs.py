@@ -0,0 +1,54 @@
+"""Benchmarks for job id allocation and workspace setup."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.agent import orchestrator
+from app.agent.job_ids import COUNTER_FILE_NAME, next_job_id
+from app.config import settings
+
+from conftest import JOB_COUNT
+
+
+@pytest.fixture(scope="module")
+def populated_jobs(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """A jobs directory holding JOB_COUNT existing run_<n> workspaces."""
+    jobs_path = tmp_path_factory.mktemp("jobs")
+    for index in range(1, JOB_COUNT + 1):
+        (jobs_path / f"run_{index}").mkdir()
+    return jobs_path
+
+
+def test_next_job_id_with_counter(benchmark, populated_jobs: Path) -> None:
+    """Steady state: the persistent counter is present."""
+    next_job_id(populated_jobs)
+    benchmark(next_job_id, populated_jobs)
+
+
+def test_next_job_id_seeding_scan(benchmark, populated_jobs: Path) -> None:
+    """First allocation after an upgrade: the counter is seeded by a scan."""
+    counter = populated_jobs / COUNTER_FILE_NAME
+
+    def drop_counter() -> None:
+        counter.unlink(missing_ok=True)
+
+    job_id = benchmark.pedantic(
+        next_job_id, args=(populated_jobs,), setup=drop_counter, rounds=20
+    )
+    assert job_id == f"run_{JOB_COUNT + 1}"
+
+
+def test_setup_job_directory(benchmark, fresh_dir: Path, monkeypatch) -> None:
+    """Build a workspace inline (pool miss) from the template."""
+    monkeypatch.setattr(settings, "remotion_jobs_path", fresh_dir)
+
+    def allocate() -> tuple[tuple[str], dict]:
+        return (next_job_id(fresh_dir),), {}
+
+    job_dir, output_dir = benchmark.pedantic(
+        orchestrator._setup_job_directory, setup=allocate, rounds=50
+    )
+    assert (job_dir / "src").is_dir() and output_dir.is_dir()
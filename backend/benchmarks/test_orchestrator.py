@@ -0,0 +1,55 @@
+"""Benchmark of the orchestrator's fixed per-job overhead.
+
+The agent run and the prompt enhancer model are stubbed (see ``stub_models``),
+so the timing covers everything the backend itself does around them: job
+directory setup, asset collection and linking, prompt building, agent option
+construction, output validation and publishing.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.agent import orchestrator, upload_catalog
+from app.agent.job_ids import next_job_id
+from app.config import settings
+
+UPLOADS_PER_JOB = 10
+
+
+@pytest.fixture
+def job_uploads(fresh_dir: Path, monkeypatch) -> None:
+    """A handful of catalogued uploads for each job to link in."""
+    upload_dir = fresh_dir / "uploads"
+    upload_dir.mkdir()
+    monkeypatch.setattr(settings, "upload_dir", upload_dir)
+    monkeypatch.setattr(settings, "remotion_jobs_path", fresh_dir / "jobs")
+    monkeypatch.setattr(settings, "output_dir", fresh_dir / "final_vids")
+    for index in range(UPLOADS_PER_JOB):
+        name = f"asset_{index}.png"
+        (upload_dir / name).write_bytes(b"\x89PNG" + bytes(1024))
+        (upload_dir / f"{name}.json").write_text(json.dumps({
+            "description": f"Asset {index}",
+            "mime_type": "image/png",
+        }))
+    upload_catalog.reconcile()
+
+
+@pytest.mark.parametrize("use_prompt_cache", [False, True], ids=["miss", "hit"])
+def test_orchestrator_fixed_overhead(
+    benchmark, run, stub_models, job_uploads, use_prompt_cache: bool
+) -> None:
+    def allocate() -> tuple[tuple[str, str], dict]:
+        job_id = next_job_id(settings.remotion_jobs_path)
+        return (job_id, "A ten second product teaser"), {
+            "use_prompt_cache": use_prompt_cache
+        }
+
+    def run_job(job_id: str, prompt: str, **kwargs) -> dict[str, str]:
+        return run(orchestrator.run(job_id, prompt, **kwargs))
+
+    result = benchmark.pedantic(run_job, setup=allocate, rounds=30)
+    assert Path(result["output_path"]).exists()
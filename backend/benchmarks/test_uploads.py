@@ -0,0 +1,184 @@
+"""Benchmarks for upload ingestion, listing and linking into jobs."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from starlette.requests import Request
+
+from app.agent import upload_catalog, upload_store
+from app.agent.upload_assets import collect_asset_summaries, copy_uploads_to_job
+from app.api.routes.uploads import list_uploads
+from app.api.upload_stream import ReceivedUpload, receive_upload
+from app.config import settings
+
+from conftest import (
+    LARGE_FILE_COUNT,
+    LARGE_FILE_MB,
+    MIB,
+    UPLOAD_COUNT,
+    write_random_file,
+)
+
+
+BOUNDARY = "renderwood-bench-boundary"
+# Body chunk size handed to the app, matching what uvicorn typically delivers.
+RECEIVE_CHUNK_SIZE = 64 * 1024
+
+
+def _upload_request(source: Path, name: str) -> Request:
+    """Build a request that streams *source* as a multipart upload form."""
+    head = (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="description"\r\n\r\n'
+        f"Benchmark asset {name}\r\n"
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{name}"\r\n'
+        "Content-Type: video/mp4\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+    length = len(head) + source.stat().st_size + len(tail)
+
+    def body() -> Iterator[bytes]:
+        yield head
+        with source.open("rb") as fh:
+            while chunk := fh.read(RECEIVE_CHUNK_SIZE):
+                yield chunk
+        yield tail
+
+    chunks = body()
+
+    async def receive() -> dict:
+        chunk = next(chunks, b"")
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunk)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/uploads",
+        "headers": [
+            (
+                b"content-type",
+                f"multipart/form-data; boundary={BOUNDARY}".encode(),
+            ),
+            (b"content-length", str(length).encode()),
+        ],
+    }
+    return Request(scope, receive)
+
+
+async def _receive(source: Path, name: str) -> ReceivedUpload:
+    return await receive_upload(
+        _upload_request(source, name),
+        file_field="file",
+        max_bytes=settings.max_upload_bytes,
+    )
+
+
+def _store_upload(upload_dir: Path, name: str, source: Path) -> None:
+    """Store *source* as an upload called *name*, the way the route does."""
+    _, _, digest, obj, size = asyncio.run(_receive(source, name))
+    upload_store.materialize(obj, upload_dir / name)
+    meta = {
+        "original_name": name,
+        "description": f"Benchmark asset {name}",
+        "mime_type": "video/mp4",
+        "size": size,
+        "sha256": digest,
+        "uploaded_at": "2026-01-01T00:00:00+00:00",
+    }
+    (upload_dir / f"{name}.json").write_text(json.dumps(meta))
+
+
+@pytest.fixture(scope="module")
+def many_uploads(
+    bench_root: Path, tmp_path_factory: pytest.TempPathFactory
+) -> Path:
+    """An upload directory with UPLOAD_COUNT small files and their sidecars."""
+    upload_dir = tmp_path_factory.mktemp("uploads-many")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "upload_dir", upload_dir)
+        for index in range(UPLOAD_COUNT):
+            name = f"clip_{index:05d}.mp4"
+            (upload_dir / name).write_bytes(index.to_bytes(8, "little"))
+            (upload_dir / f"{name}.json").write_text(json.dumps({
+                "description": f"Benchmark asset {index}",
+                "mime_type": "video/mp4",
+                "size": 8,
+                "sha256": f"{index:064x}",
+            }))
+        upload_catalog.reconcile()
+    return upload_dir
+
+
+@pytest.fixture(scope="module")
+def large_uploads(
+    bench_root: Path, tmp_path_factory: pytest.TempPathFactory
+) -> Path:
+    """An upload directory with LARGE_FILE_COUNT stored LARGE_FILE_MB files."""
+    upload_dir = tmp_path_factory.mktemp("uploads-large")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "upload_dir", upload_dir)
+        for index in range(LARGE_FILE_COUNT):
+            source = upload_dir.parent / f"large-source-{index}.mp4"
+            write_random_file(source, LARGE_FILE_MB * MIB)
+            _store_upload(upload_dir, f"large_{index}.mp4", source)
+            source.unlink()
+        upload_catalog.reconcile()
+    return upload_dir
+
+
+def test_list_uploads(benchmark, run, many_uploads: Path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "upload_dir", many_uploads)
+    files = benchmark(lambda: run(list_uploads()))
+    assert len(files) == UPLOAD_COUNT
+
+
+def test_collect_asset_summaries(benchmark, many_uploads: Path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "upload_dir", many_uploads)
+    summaries = benchmark(collect_asset_summaries)
+    assert len(summaries) == UPLOAD_COUNT
+
+
+def test_catalog_reconcile_unchanged(
+    benchmark, many_uploads: Path, monkeypatch
+) -> None:
+    """Startup reconcile when nothing changed on disk."""
+    monkeypatch.setattr(settings, "upload_dir", many_uploads)
+    benchmark(upload_catalog.reconcile)
+
+
+def test_copy_uploads_to_job_large_files(
+    benchmark, large_uploads: Path, fresh_dir: Path, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "upload_dir", large_uploads)
+    counter = iter(range(1_000_000))
+
+    def new_job_dir() -> tuple[tuple[Path], dict]:
+        return (fresh_dir / f"job_{next(counter)}",), {}
+
+    benchmark.pedantic(copy_uploads_to_job, setup=new_job_dir, rounds=20)
+    benchmark.extra_info["bytes_per_job"] = LARGE_FILE_COUNT * LARGE_FILE_MB * MIB
+
+
+def test_receive_upload_throughput(
+    benchmark, run, fresh_dir: Path, monkeypatch
+) -> None:
+    """Streaming multipart parse and hash-while-writing of one LARGE_FILE_MB upload."""
+    monkeypatch.setattr(settings, "upload_dir", fresh_dir / "uploads")
+    source = fresh_dir / "incoming.mp4"
+    size = LARGE_FILE_MB * MIB
+    write_random_file(source, size)
+
+    upload = benchmark.pedantic(
+        lambda: run(_receive(source, "incoming.mp4")), rounds=10
+    )
+    assert upload.size == size and upload.object_path.exists()
+    benchmark.extra_info["bytes"] = size
+    benchmark.extra_info["mib_per_second"] = round(
+        size / MIB / benchmark.stats.stats.mean, 1
+    )
@@ -2,3 +2,16 @@ import { Config } from '@remotion/cli/config';
 
 Config.setEntryPoint('./src/index.js');
 Config.setOverwriteOutput(true);
+
+// Share one persistent webpack cache across all job workspaces. The backend
+// points this at a directory keyed on the template's lockfile. Only
+// node_modules hits it across jobs; each workspace's src/ has its own paths.
+const bundleCacheDir = process.env.REMOTION_BUNDLE_CACHE_DIR;
+if (bundleCacheDir) {
+  Config.overrideWebpackConfig((config) => ({
+    ...config,
+    cache: config.cache
+      ? { ...config.cache, cacheDirectory: bundleCacheDir }
+      : config.cache,
+  }));
+}
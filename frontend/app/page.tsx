@@ -40,6 +40,7 @@ export default function Home() {
       <ComposerWindow
         fileInputRef={app.fileInputRef}
         isStyleMenuOpen={app.isStyleMenuOpen}
+        isRegenerate={app.isRegenerate}
         isSubmitting={app.isSubmitting}
         isTrailerSelected={app.isTrailerSelected}
         isUploading={app.isUploading}
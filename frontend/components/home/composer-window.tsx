@@ -6,6 +6,7 @@ import { WindowFrame } from "@/components/home/window-frame";
 type ComposerWindowProps = {
   fileInputRef: RefObject<HTMLInputElement | null>;
   isStyleMenuOpen: boolean;
+  isRegenerate: boolean;
   isSubmitting: boolean;
   isTrailerSelected: boolean;
   isUploading: boolean;
@@ -24,6 +25,7 @@ type ComposerWindowProps = {
 export function ComposerWindow({
   fileInputRef,
   isStyleMenuOpen,
+  isRegenerate,
   isSubmitting,
   isTrailerSelected,
   isUploading,
@@ -124,7 +126,16 @@ export function ComposerWindow({
                   type="button"
                   className="ai-send-btn"
                   aria-label={
-                    isSubmitting ? "Submitting prompt" : "Submit prompt"
+                    isSubmitting
+                      ? "Submitting prompt"
+                      : isRegenerate
+                        ? "Regenerate video"
+                        : "Submit prompt"
+                  }
+                  title={
+                    isRegenerate
+                      ? "Generate a new take instead of reusing this video"
+                      : undefined
                   }
                   onClick={() => submitPrompt(prompt, selectedStyle)}
                   disabled={isSubmitting || !prompt.trim()}
@@ -144,7 +155,9 @@ export function ComposerWindow({
                       ))}
                     </span>
                   ) : (
-                    <span aria-hidden="true">&#8593;</span>
+                    <span aria-hidden="true">
+                      {isRegenerate ? "\u21bb" : "\u2191"}
+                    </span>
                   )}
                 </button>
               </div>
@@ -13,14 +13,20 @@ import {
   createVideo,
   deleteUpload,
   getVideoUrl,
+  isJobPending,
   listUploads,
   listVideoStyles,
   uploadFile,
+  waitForJob,
 } from "@/lib/api";
 import type { UploadedFile, VideoStyle, VideoStyleOption } from "@/lib/api";
 import { DEFAULT_VIDEO_STYLE_OPTIONS } from "@/components/home/constants";
 import type { WindowType } from "@/components/home/types";
 
+function videoRequestKey(prompt: string, style: VideoStyle): string {
+  return `${style}\n${prompt}`;
+}
+
 export function useRenderwoodApp() {
   const [isStartMenuOpen, setIsStartMenuOpen] = useState(false);
   const [openWindow, setOpenWindow] = useState<WindowType>(null);
@@ -42,6 +48,10 @@ export function useRenderwoodApp() {
   const [selectedStyle, setSelectedStyle] = useState<VideoStyle>("general");
   const [isStyleMenuOpen, setIsStyleMenuOpen] = useState(false);
   const [clockText, setClockText] = useState("");
+  // Prompt and style of the video on screen; sending them again regenerates.
+  const [lastRenderedRequest, setLastRenderedRequest] = useState<
+    string | null
+  >(null);
 
   const fileInputRef = useRef<HTMLInputElement | null>(null);
   const videoRef = useRef<HTMLVideoElement | null>(null);
@@ -221,6 +231,9 @@ export function useRenderwoodApp() {
     lastSubmittedPromptRef.current = trimmed;
     requestControllerRef.current?.abort();
 
+    const requestKey = videoRequestKey(trimmed, style);
+    const fresh = requestKey === lastRenderedRequest;
+
     const controller = new AbortController();
     requestControllerRef.current = controller;
 
@@ -228,14 +241,27 @@ export function useRenderwoodApp() {
     setSubmitError(null);
 
     try {
-      const result = await createVideo(trimmed, style, controller.signal);
-
-      if (result.status === "failed") {
-        setSubmitError(result.error ?? "Video request failed.");
-        lastSubmittedPromptRef.current = null;
+      const created = await createVideo(
+        trimmed,
+        style,
+        controller.signal,
+        fresh,
+      );
+      const result = isJobPending(created.status)
+        ? await waitForJob(created.job_id, controller.signal)
+        : created;
+
+      if (result.status !== "complete") {
+        setSubmitError(
+          result.error ??
+            (result.status === "cancelled"
+              ? "Video request was cancelled."
+              : "Video request failed."),
+        );
         return;
       }
 
+      setLastRenderedRequest(requestKey);
       setVideoUrl(getVideoUrl(result.job_id));
       toast("Video ready", {
         description: "Your generated video is now available to view.",
@@ -248,13 +274,13 @@ export function useRenderwoodApp() {
       setSubmitError(
         error instanceof Error ? error.message : "Failed to send prompt.",
       );
-      lastSubmittedPromptRef.current = null;
     } finally {
       if (requestControllerRef.current === controller) {
+        lastSubmittedPromptRef.current = null;
         setIsSubmitting(false);
       }
     }
-  }, []);
+  }, [lastRenderedRequest]);
 
   const handlePlayPause = useCallback(() => {
     const video = videoRef.current;
@@ -314,6 +340,9 @@ export function useRenderwoodApp() {
       : "Ready";
   const progressPercent = duration > 0 ? (currentTime / duration) * 100 : 0;
   const isTrailerSelected = selectedStyle === "trailer";
+  const isRegenerate =
+    lastRenderedRequest !== null &&
+    videoRequestKey(prompt.trim(), selectedStyle) === lastRenderedRequest;
 
   return {
     clockText,
@@ -333,6 +362,7 @@ export function useRenderwoodApp() {
     handleProgressClick,
     handleStop,
     isPlaying,
+    isRegenerate,
     isStartMenuOpen,
     isStyleMenuOpen,
     isSubmitting,
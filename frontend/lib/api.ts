@@ -1,4 +1,5 @@
 import type {
+  JobStatusResponse,
   UploadedFile,
   VideoCreateRequest,
   VideoCreateResponse,
@@ -9,6 +10,8 @@ import type {
 const API_BASE_URL =
   process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000";
 
+const JOB_POLL_INTERVAL_MS = 2000;
+
 async function parseErrorMessage(response: Response): Promise<string> {
   const contentType = response.headers.get("content-type") ?? "";
 
@@ -52,10 +55,12 @@ export async function createVideo(
   prompt: string,
   videoStyle: VideoStyle = "general",
   signal?: AbortSignal,
+  fresh = false,
 ): Promise<VideoCreateResponse> {
   const payload: VideoCreateRequest = {
     prompt,
     video_style: videoStyle,
+    fresh,
   };
 
   return requestJson<VideoCreateResponse>(
@@ -72,6 +77,48 @@ export async function createVideo(
   );
 }
 
+export async function getJob(
+  jobId: string,
+  signal?: AbortSignal,
+): Promise<JobStatusResponse> {
+  return requestJson<JobStatusResponse>(
+    `/api/jobs/${encodeURIComponent(jobId)}`,
+    { signal },
+    "Failed to fetch job status",
+  );
+}
+
+function delay(ms: number, signal?: AbortSignal): Promise<void> {
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(resolve, ms);
+    signal?.addEventListener(
+      "abort",
+      () => {
+        clearTimeout(timer);
+        reject(new DOMException("Aborted", "AbortError"));
+      },
+      { once: true },
+    );
+  });
+}
+
+export function isJobPending(status: VideoCreateResponse["status"]): boolean {
+  return status === "queued" || status === "running";
+}
+
+export async function waitForJob(
+  jobId: string,
+  signal?: AbortSignal,
+): Promise<JobStatusResponse> {
+  for (;;) {
+    const job = await getJob(jobId, signal);
+    if (!isJobPending(job.status)) {
+      return job;
+    }
+    await delay(JOB_POLL_INTERVAL_MS, signal);
+  }
+}
+
 export async function listUploads(): Promise<UploadedFile[]> {
   return requestJson<UploadedFile[]>(
     "/api/uploads",
@@ -125,6 +172,7 @@ export function getVideoUrl(jobId: string): string {
 }
 
 export type {
+  JobStatusResponse,
   UploadedFile,
   VideoCreateResponse,
   VideoStyle,
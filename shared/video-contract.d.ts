@@ -6,11 +6,20 @@ export interface VideoStyleOption {
   description: string;
 }
 
-export type VideoJobStatus = "complete" | "failed";
+export type VideoJobStatus =
+  | "queued"
+  | "running"
+  | "complete"
+  | "failed"
+  | "cancelled";
 
 export interface VideoCreateRequest {
   prompt: string;
   video_style?: VideoStyle;
+  bypass_prompt_cache?: boolean;
+  use_original_assets?: boolean;
+  /** Render a new video even if an identical request already has one. */
+  fresh?: boolean;
 }
 
 export interface VideoCreateResponse {
@@ -21,6 +30,21 @@ export interface VideoCreateResponse {
   error?: string | null;
 }
 
+export interface JobStatusResponse {
+  job_id: string;
+  status: VideoJobStatus;
+  stage: string;
+  video_style: VideoStyle;
+  created_at: string;
+  started_at: string;
+  finished_at: string;
+  output_path?: string | null;
+  job_project_path?: string | null;
+  hls_path?: string | null;
+  source_job_id?: string | null;
+  error?: string | null;
+}
+
 export interface UploadedFile {
   name: string;
   size: number;